@@ -0,0 +1,179 @@
+"""Run the same logical queries on every store at once and compare speed and answers.
+
+The stores must already be loaded, by data_pipeline.py or by `python test2.py --compare`
+(which loads its sample into PostgreSQL, MongoDB and Neo4j and compares those three). Each query is sent to all
+five stores concurrently; a store that fails or exceeds --timeout is reported and the
+others still count. Every store's rows are checked against PostgreSQL's answer
+(or the first store that answered).
+
+    python -m benchmarks.compare_stores --user-id 314 --book-id 1 --repeat 5 --json stores.json
+"""
+import argparse
+import importlib
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from db.connection_manager import ConnectionManager
+
+# Store name (as in ConnectionManager) -> QueryBackend class.
+BACKENDS = {
+    "postgres": ("query.postgres_backend", "PostgresQueryBackend"),
+    "mongo": ("query.mongo_backend", "MongoQueryBackend"),
+    "neo4j": ("query.neo4j_backend", "Neo4jQueryBackend"),
+    "clickhouse": ("query.clickhouse_backend", "ClickhouseQueryBackend"),
+    "mssql": ("query.mssql_backend", "MSSQLQueryBackend"),
+}
+
+
+class TaskResult(BaseModel):
+    """Outcome of one task in a fan-out: ok, error or timeout, with its wall time."""
+    name: str
+    status: str
+    seconds: float
+    value: Any = None
+    error: Optional[str] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+def fan_out(tasks: dict[str, Callable[[], Any]], timeout: float) -> dict[str, TaskResult]:
+    """Run every task concurrently and wait at most `timeout` seconds in total.
+
+    Failures and timeouts become results instead of exceptions, so one slow or
+    broken store never hides the others. A timed-out task keeps running in the
+    background (threads cannot be cancelled), but nobody waits for it.
+    """
+    started: dict[str, float] = {}
+    finished: dict[str, float] = {}
+
+    def timed(name, task):
+        started[name] = time.perf_counter()
+        try:
+            return task()
+        finally:
+            finished[name] = time.perf_counter()
+
+    executor = ThreadPoolExecutor(max_workers=max(len(tasks), 1))
+    start = time.perf_counter()
+    futures = {executor.submit(timed, name, task): name for name, task in tasks.items()}
+    wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+    results = {}
+    for future, name in futures.items():
+        if not future.done():
+            results[name] = TaskResult(name=name, status="timeout", seconds=time.perf_counter() - start,
+                                       error=f"no answer within {timeout}s")
+            continue
+        seconds = finished.get(name, start) - started.get(name, start)
+        error = future.exception()
+        results[name] = TaskResult(name=name, status="ok", seconds=seconds, value=future.result()) \
+            if error is None else TaskResult(name=name, status="error", seconds=seconds, error=repr(error))
+    return results
+
+
+def normalize(query: str, rows: list[dict]):
+    """The part of a query's answer every store must agree on, independent of row order and types."""
+    if query == "ratings_by_user":
+        return sorted((int(row["book_id"]), round(float(row["rating"]), 2)) for row in rows)
+    if query == "users_who_rated":
+        return sorted(int(row["user_id"]) for row in rows)
+    # Ties in the average make the chosen books order-dependent, so top_n compares the averages.
+    return sorted(round(float(row["avg_rating"]), 2) for row in rows)
+
+
+def make_backends(connections: ConnectionManager, stores: list[str]) -> dict[str, Callable[[], Any]]:
+    """Backend getters that build on first call, inside the fan-out, so a store whose driver is
+    missing or whose server is down reports its own error or timeout."""
+    built = {}
+
+    def backend(store):
+        if store not in built:
+            module_name, class_name = BACKENDS[store]
+            built[store] = getattr(importlib.import_module(module_name), class_name)(client=connections.client(store))
+        return built[store]
+    return {store: (lambda store=store: backend(store)) for store in stores}
+
+
+def compare_query(backends: dict[str, Any], query: str, args: tuple, repeat: int, timeout: float,
+                  reference: str = "postgres") -> dict:
+    """Run one query `repeat` times on every store; timings, row counts and agreement per store."""
+    runs: dict[str, list[TaskResult]] = {store: [] for store in backends}
+    for _ in range(repeat):
+        results = fan_out({store: (lambda backend=backend: getattr(backend(), query)(*args))
+                           for store, backend in backends.items()}, timeout)
+        for store, result in results.items():
+            runs[store].append(result)
+
+    stores = {}
+    for store, results in runs.items():
+        ok = [result for result in results if result.status == "ok"]
+        last = results[-1]
+        stores[store] = {
+            "status": "ok" if ok else last.status,
+            "error": None if ok else last.error,
+            "median_ms": round(statistics.median(result.seconds for result in ok) * 1000, 2) if ok else None,
+            "min_ms": round(min(result.seconds for result in ok) * 1000, 2) if ok else None,
+            "failures": len(results) - len(ok),
+            "rows": len(ok[-1].value) if ok else None,
+            "answer": normalize(query, ok[-1].value) if ok else None,
+        }
+
+    answered = [store for store, entry in stores.items() if entry["status"] == "ok"]
+    baseline = reference if reference in answered else (answered[0] if answered else None)
+    expected = stores[baseline]["answer"] if baseline else None
+    for entry in stores.values():
+        answer = entry.pop("answer")
+        entry["agrees"] = None if baseline is None or answer is None else answer == expected
+    fastest = min(answered, key=lambda store: stores[store]["median_ms"]) if answered else None
+    return {"query": query, "args": list(args), "reference": baseline, "fastest": fastest, "stores": stores}
+
+
+def run_comparison(connections: ConnectionManager, user_id: int, book_id: int, n: int = 5,
+                   stores: Optional[list[str]] = None, repeat: int = 3, timeout: float = 10.0) -> list[dict]:
+    backends = make_backends(connections, stores or list(BACKENDS))
+    queries = [("ratings_by_user", (user_id,)), ("users_who_rated", (book_id,)), ("top_n", (n,))]
+    return [compare_query(backends, query, args, repeat, timeout) for query, args in queries]
+
+
+def print_report(report: list[dict]):
+    for entry in report:
+        print(f"\n{entry['query']}{tuple(entry['args'])}  fastest: {entry['fastest'] or '-'}  "
+              f"reference: {entry['reference'] or '-'}")
+        print(f"  {'store':<11} {'status':<8} {'median ms':>10} {'min ms':>9} {'rows':>6}  agrees")
+        for store, row in entry["stores"].items():
+            median = f"{row['median_ms']:.2f}" if row["median_ms"] is not None else "-"
+            minimum = f"{row['min_ms']:.2f}" if row["min_ms"] is not None else "-"
+            rows = row["rows"] if row["rows"] is not None else "-"
+            agrees = {True: "yes", False: "NO", None: "-"}[row["agrees"]]
+            print(f"  {store:<11} {row['status']:<8} {median:>10} {minimum:>9} {rows:>6}  {agrees}"
+                  + (f"  ({row['error']})" if row["error"] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the logical queries across every store.")
+    parser.add_argument("--user-id", type=int, default=314)
+    parser.add_argument("--book-id", type=int, default=1)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--stores", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query and store")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for each fan-out")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    with ConnectionManager() as connections:
+        report = run_comparison(connections, args.user_id, args.book_id, args.top_n, args.stores,
+                                args.repeat, args.timeout)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
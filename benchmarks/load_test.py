@@ -0,0 +1,236 @@
+"""Load-test the API with Goodbooks-shaped traffic.
+
+User and book ids are drawn from a Zipf distribution over ids ranked by
+popularity, so a few bestsellers and heavy raters get most of the requests,
+as on the real site. Against a running API:
+
+    uvicorn main:app --workers 4 &
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --concurrency 32 --duration 30
+
+Without a server or PostgreSQL, --sqlite seeds a SQLite stand-in from data/ and
+drives the app in-process:
+
+    python -m benchmarks.load_test --sqlite /tmp/loadtest.db --duration 10 --save-baseline baseline.json
+    python -m benchmarks.load_test --sqlite /tmp/loadtest.db --duration 10 --baseline baseline.json
+
+With --baseline, the run exits non-zero when an endpoint's p95 latency or
+throughput is more than --max-regression worse than the baseline, or its
+error rate grows.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+import pandas as pd
+
+# name -> (method, path or path template, relative weight)
+ENDPOINTS = {
+    "ratings_by_user": ("GET", "/api/relational/ratings_by_user/{user_id}", 40),
+    "users_who_rated": ("GET", "/api/relational/users_who_rated/{book_id}", 30),
+    "ratings_by_user_batch": ("POST", "/api/relational/ratings_by_user", 10),
+    "top5_books": ("GET", "/api/relational/top5_books", 10),
+    "search": ("GET", "/api/search?q={query}", 10),
+}
+DEFAULT_ENDPOINTS = ["ratings_by_user", "users_who_rated", "ratings_by_user_batch", "top5_books"]
+BATCH_IDS = 20
+
+
+class IdSampler:
+    """Draws ids with Zipf-distributed popularity rank: the most popular id is picked most often."""
+
+    def __init__(self, ids_by_popularity, exponent: float = 1.2, seed: int = 42):
+        self.ids = np.asarray(ids_by_popularity)
+        self.exponent = exponent
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, size: Optional[int] = None):
+        ranks = self.rng.zipf(self.exponent, size)
+        # Ranks beyond the catalogue wrap around rather than piling onto the last id.
+        picked = self.ids[(np.asarray(ranks) - 1) % len(self.ids)]
+        return picked.tolist() if size is not None else picked.item()
+
+
+def load_dataset(data_dir: str, max_ratings: int, seed: int = 42) -> dict[str, pd.DataFrame]:
+    """books, users and ratings from data_dir. Without ratings.csv, ratings are synthesised with
+    Zipf-popular books, weighted by each book's real ratings_count."""
+    books = pd.read_csv(os.path.join(data_dir, "books.csv"),
+                        usecols=["book_id", "goodreads_book_id", "title", "authors", "ratings_count"])
+    ratings_path = os.path.join(data_dir, "ratings.csv")
+    if os.path.exists(ratings_path):
+        ratings = pd.read_csv(ratings_path, nrows=max_ratings)
+    else:
+        rng = np.random.default_rng(seed)
+        popular = books.sort_values("ratings_count", ascending=False)["book_id"].to_numpy()
+        user_ids = IdSampler(np.arange(1, max_ratings // 20 + 2), seed=seed).sample(max_ratings)
+        book_ids = IdSampler(popular, exponent=1.1, seed=seed + 1).sample(max_ratings)
+        ratings = pd.DataFrame({"user_id": user_ids, "book_id": book_ids,
+                                "rating": rng.integers(1, 6, max_ratings)})
+    ratings = ratings.drop_duplicates(["user_id", "book_id"])
+    users = pd.DataFrame({"user_id": np.sort(ratings["user_id"].unique())})
+    users["user_name"] = "User" + users["user_id"].astype(str)
+    return {"books": books, "users": users, "ratings": ratings}
+
+
+def seed_sqlite(path: str, dataset: dict[str, pd.DataFrame]):
+    """Write the tables the relational endpoints read, with the indexes schema.sql creates."""
+    import sqlite3
+
+    if os.path.exists(path):
+        os.remove(path)
+    with sqlite3.connect(path) as conn:
+        for name, frame in dataset.items():
+            frame.to_sql(name, conn, index=False)
+        conn.execute("CREATE INDEX ratings_user_idx ON ratings (user_id)")
+        conn.execute("CREATE INDEX ratings_book_idx ON ratings (book_id)")
+        conn.execute("CREATE UNIQUE INDEX users_pk ON users (user_id)")
+    print(f"Seeded {path}: " + ", ".join(f"{len(frame)} {name}" for name, frame in dataset.items()))
+
+
+def request_factory(endpoints: list[str], dataset: dict[str, pd.DataFrame],
+                    seed: int = 42) -> Callable[[], tuple[str, str, str, Optional[dict]]]:
+    """A function returning the next (endpoint, method, url, json body) to send."""
+    rng = np.random.default_rng(seed)
+    ratings = dataset["ratings"]
+    users = IdSampler(ratings["user_id"].value_counts().index, seed=seed)
+    books = IdSampler(ratings["book_id"].value_counts().index, seed=seed + 1)
+    titles = dataset["books"].sort_values("ratings_count", ascending=False)["title"].astype(str).tolist()
+    # Search-as-you-type traffic: prefixes of popular titles' first words.
+    queries = IdSampler([title.split()[0][:4].lower() for title in titles if title.split()], seed=seed + 2)
+    weights = np.array([ENDPOINTS[name][2] for name in endpoints], dtype=float)
+    weights /= weights.sum()
+
+    def next_request():
+        name = endpoints[rng.choice(len(endpoints), p=weights)]
+        method, template, _ = ENDPOINTS[name]
+        if name == "ratings_by_user_batch":
+            return name, method, template, {"ids": users.sample(BATCH_IDS)}
+        return name, method, template.format(user_id=users.sample(), book_id=books.sample(),
+                                             query=queries.sample()), None
+
+    return next_request
+
+
+async def drive(client: httpx.AsyncClient, next_request, concurrency: int, duration: float,
+                max_requests: Optional[int] = None) -> dict[str, list[tuple[float, bool]]]:
+    """Run `concurrency` workers for `duration` seconds (or max_requests); (latency, ok) per endpoint."""
+    samples: dict[str, list[tuple[float, bool]]] = {}
+    deadline = time.perf_counter() + duration
+    sent = 0
+
+    async def worker():
+        nonlocal sent
+        while time.perf_counter() < deadline and (max_requests is None or sent < max_requests):
+            sent += 1
+            name, method, url, body = next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples.setdefault(name, []).append((time.perf_counter() - start, ok))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def summarize(samples: dict[str, list[tuple[float, bool]]], elapsed: float) -> dict[str, dict]:
+    """Per-endpoint RPS, latency percentiles (ms) and error rate."""
+    report = {}
+    for name, values in sorted(samples.items()):
+        latencies = np.array([latency for latency, _ in values]) * 1000
+        errors = sum(not ok for _, ok in values)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[name] = {"requests": len(values), "rps": round(len(values) / elapsed, 1),
+                        "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+                        "p99_ms": round(float(p99), 2), "error_rate": round(errors / len(values), 4)}
+    return report
+
+
+def regressions(report: dict[str, dict], baseline: dict[str, dict], max_regression: float = 0.2) -> list[str]:
+    """Endpoints that got slower, lost throughput or failed more often than the baseline allows."""
+    problems = []
+    for name, base in baseline.items():
+        current = report.get(name)
+        if current is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            problems.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if current["rps"] < base["rps"] * (1 - max_regression):
+            problems.append(f"{name}: {current['rps']} req/s vs baseline {base['rps']} req/s")
+        if current["error_rate"] > base["error_rate"]:
+            problems.append(f"{name}: error rate {current['error_rate']} vs baseline {base['error_rate']}")
+    return problems
+
+
+def in_process_client(sqlite_path: str) -> httpx.AsyncClient:
+    """A client calling main.app directly, backed by the SQLite stand-in."""
+    os.environ["POSTGRES_URL"] = f"sqlite:///{sqlite_path}"
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest")
+
+
+async def run(args) -> dict[str, dict]:
+    dataset = load_dataset(args.data_dir, args.ratings)
+    if args.sqlite:
+        seed_sqlite(args.sqlite, dataset)
+        client = in_process_client(args.sqlite)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+    next_request = request_factory(args.endpoints, dataset)
+    async with client:
+        # A short warm-up fills connection pools and reflects tables before measuring.
+        await drive(client, next_request, args.concurrency, duration=1.0, max_requests=args.concurrency * 2)
+        start = time.perf_counter()
+        samples = await drive(client, next_request, args.concurrency, args.duration, args.requests)
+        elapsed = time.perf_counter() - start
+    return summarize(samples, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with Zipf-distributed Goodbooks ids.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://127.0.0.1:8000", help="a running API")
+    target.add_argument("--sqlite", help="seed this SQLite file and drive the app in-process instead")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--ratings", type=int, default=200_000, help="ratings to read (or synthesise)")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS, choices=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--save-baseline", help="write the report as the baseline for later runs")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed fractional loss in p95 latency or throughput (default 0.2)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"{'endpoint':<24} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, row in report.items():
+        print(f"{name:<24} {row['requests']:>8} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['error_rate']:>7.2%}")
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = regressions(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
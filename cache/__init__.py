@@ -0,0 +1,4 @@
+from .dataset_version import DatasetVersion
+from .http import ConditionalGetMiddleware
+
+__all__ = ["DatasetVersion", "ConditionalGetMiddleware"]
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+DEFAULT_FILENAME = ".dataset_version.json"
+
+
+class DatasetVersion:
+    """A counter in a small JSON file that DataPipeline bumps after every load.
+
+    The API reads it to build cache validators, so it works across processes
+    without a database round trip. The file is re-read only when its mtime
+    changes, which makes read() a single stat() on the hot path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp = None
+        self._value: tuple[int, Optional[float]] = (0, None)
+        self._lock = threading.Lock()
+        self._bump_lock = threading.Lock()
+
+    def read(self) -> tuple[int, Optional[float]]:
+        """(version, time of the load as a Unix timestamp); (0, None) before the first load."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0, None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    with open(self.path) as f:
+                        data = json.load(f)
+                    self._value = (int(data["version"]), float(data["updated"]))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Could not read dataset version from {self.path}: {e}")
+                    return 0, None
+                self._stamp = stamp
+            return self._value
+
+    def bump(self) -> int:
+        """Increment the version; the file is replaced atomically so readers never see half of it.
+
+        Threads of one process bump one at a time, so none of their increments is lost.
+        """
+        with self._bump_lock:
+            version = self.read()[0] + 1
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            updated = time.time()
+            with open(temporary, "w") as f:
+                json.dump({"version": version, "updated": updated}, f)
+            os.replace(temporary, self.path)
+            # Two bumps may share an mtime, so remember what was written rather than re-reading it.
+            stat = os.stat(self.path)
+            with self._lock:
+                self._stamp = (stat.st_mtime_ns, stat.st_size)
+                self._value = (version, updated)
+            return version
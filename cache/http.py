@@ -0,0 +1,71 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterable
+
+from .dataset_version import DatasetVersion
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison; weak, as RFC 9110 requires for GET."""
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag.removeprefix("W/") for value in candidates)
+
+
+def not_modified_since(header: str, updated: float) -> bool:
+    try:
+        return int(updated) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware adding ETag/Last-Modified from the dataset version to GET responses.
+
+    Query results only change when the pipeline loads new data, so a request
+    whose If-None-Match (or If-Modified-Since) matches the current version is
+    answered 304 before it reaches an endpoint or a database. Paths outside
+    `prefixes`, or in `exclude` (live statistics), are passed through untouched.
+    """
+
+    def __init__(self, app, version: DatasetVersion, prefixes: Iterable[str] = ("/api/",),
+                 exclude: Iterable[str] = (), cache_control: str = "no-cache"):
+        self.app = app
+        self.version = version
+        self.prefixes = tuple(prefixes)
+        self.exclude = tuple(exclude)
+        # no-cache lets caches store responses but revalidate them on every use.
+        self.cache_control = cache_control
+
+    def cacheable(self, scope) -> bool:
+        # Lifespan and websocket scopes pass straight through; only http scopes have a method.
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return False
+        path = scope["path"]
+        return path.startswith(self.prefixes) and not path.startswith(self.exclude)
+
+    async def __call__(self, scope, receive, send):
+        if not self.cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+        version, updated = self.version.read()
+        if not version:
+            await self.app(scope, receive, send)
+            return
+        etag = f'W/"{version}"'
+        validators = [(b"etag", etag.encode()), (b"last-modified", formatdate(updated, usegmt=True).encode()),
+                      (b"cache-control", self.cache_control.encode())]
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        if "if-none-match" in headers:
+            fresh = etag_matches(headers["if-none-match"], etag)
+        else:
+            fresh = "if-modified-since" in headers and not_modified_since(headers["if-modified-since"], updated)
+        if fresh:
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = list(message.get("headers", [])) + validators
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -1,4 +1,7 @@
 -- ClickHouse Schema for Goodbooks 10K Dataset
+-- Tables are ReplacingMergeTree ordered by their primary key, so re-loading a row
+-- replaces it (on merge; query with FINAL for exact results). The deduplication
+-- window also drops a retried insert block that is identical to a recent one.
 
 DROP TABLE IF EXISTS book_tags;
 DROP TABLE IF EXISTS to_read;
@@ -21,41 +24,47 @@ CREATE TABLE books (
     text_reviews_count Int32,
     publication_date Nullable(String),
     publisher Nullable(String)
-) ENGINE = MergeTree()
-ORDER BY goodreads_book_id;
+) ENGINE = ReplacingMergeTree()
+ORDER BY goodreads_book_id
+SETTINGS non_replicated_deduplication_window = 100;
 
 -- Create the ratings table
 CREATE TABLE ratings (
     user_id Int32,
     goodreads_book_id Int32,
     rating Float32
-) ENGINE = MergeTree()
-ORDER BY (user_id, goodreads_book_id);
+) ENGINE = ReplacingMergeTree()
+ORDER BY (user_id, goodreads_book_id)
+SETTINGS non_replicated_deduplication_window = 100;
 
 -- Create the tags table
 CREATE TABLE tags (
     tag_id Int32,
     tag String
-) ENGINE = MergeTree()
-ORDER BY tag_id;
+) ENGINE = ReplacingMergeTree()
+ORDER BY tag_id
+SETTINGS non_replicated_deduplication_window = 100;
 
 -- Create the book_tags linking table
 CREATE TABLE book_tags (
     goodreads_book_id Int32,
     tag_id Int32
-) ENGINE = MergeTree()
-ORDER BY (goodreads_book_id, tag_id);
+) ENGINE = ReplacingMergeTree()
+ORDER BY (goodreads_book_id, tag_id)
+SETTINGS non_replicated_deduplication_window = 100;
 
 -- Create the to_read table
 CREATE TABLE to_read (
     user_id Int32,
     goodreads_book_id Int32
-) ENGINE = MergeTree()
-ORDER BY (user_id, goodreads_book_id);
+) ENGINE = ReplacingMergeTree()
+ORDER BY (user_id, goodreads_book_id)
+SETTINGS non_replicated_deduplication_window = 100;
 
 -- Create the links table
 CREATE TABLE links (
     goodreads_book_id Int32,
     link String
-) ENGINE = MergeTree()
-ORDER BY goodreads_book_id;
+) ENGINE = ReplacingMergeTree()
+ORDER BY goodreads_book_id
+SETTINGS non_replicated_deduplication_window = 100;
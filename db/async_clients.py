@@ -0,0 +1,171 @@
+import asyncio
+import math
+from abc import ABC, abstractmethod
+from typing import Optional
+from pydantic import BaseModel
+from sqlalchemy.engine import make_url
+
+from .config import DatabaseSettings
+from .database_client import PartialWriteError
+
+
+def clean_record(record: dict) -> tuple:
+    # Binary protocols reject pandas' NaN placeholders for missing values.
+    return tuple(None if isinstance(v, float) and math.isnan(v) else v for v in record.values())
+
+
+class AsyncDatabaseClient(BaseModel, ABC):
+    """asyncio counterpart of DatabaseClient; drivers are imported in connect()."""
+    connection_string: str
+    # Batches in flight at once; pools are sized to match.
+    pool_size: int = 4
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @abstractmethod
+    async def connect(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_data(self, table_name: str, data: list[dict]):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def close(self):
+        raise NotImplementedError
+
+
+class AsyncPostgreSQLClient(AsyncDatabaseClient):
+    pool: Optional[object] = None
+
+    async def connect(self):
+        import asyncpg
+
+        # asyncpg takes a plain libpq URL, without SQLAlchemy's "+driver" suffix.
+        dsn = make_url(self.connection_string).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.pool = await asyncpg.create_pool(dsn, min_size=1, max_size=self.pool_size)
+
+    async def insert_data(self, table_name: str, data: list[dict]):
+        if not data:
+            return
+        async with self.pool.acquire() as connection:
+            await connection.copy_records_to_table(table_name, records=[clean_record(r) for r in data],
+                                                   columns=list(data[0].keys()))
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+
+class AsyncMongoDBClient(AsyncDatabaseClient):
+    client: Optional[object] = None
+    db: Optional[object] = None
+
+    async def connect(self):
+        try:
+            from pymongo import AsyncMongoClient
+        except ImportError:
+            from motor.motor_asyncio import AsyncIOMotorClient as AsyncMongoClient
+        self.client = AsyncMongoClient(self.connection_string, maxPoolSize=self.pool_size)
+        self.db = self.client.get_database("data-hw1")
+
+    async def insert_data(self, collection_name: str, data: list[dict]):
+        if not data:
+            return
+        from pymongo.errors import BulkWriteError
+
+        # insert_many adds _id to each document; copy so other sinks never see it.
+        try:
+            await self.db[collection_name].insert_many([dict(record) for record in data], ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors")
+            if not write_errors:
+                raise
+            raise PartialWriteError({error["index"]: error["errmsg"] for error in write_errors}) from e
+
+    async def close(self):
+        if self.client:
+            result = self.client.close()
+            if asyncio.iscoroutine(result):
+                await result
+            self.client = None
+
+
+class AsyncNeo4jClient(AsyncDatabaseClient):
+    driver: Optional[object] = None
+
+    async def connect(self):
+        from neo4j import AsyncGraphDatabase, basic_auth
+
+        self.driver = AsyncGraphDatabase.driver(self.connection_string, auth=basic_auth("neo4j", "your_password"),
+                                                max_connection_pool_size=self.pool_size)
+
+    async def insert_data(self, label: str, data: list[dict]):
+        if not data:
+            return
+        rows = [dict(zip(record.keys(), clean_record(record))) for record in data]
+        async with self.driver.session() as session:
+            result = await session.run(f"UNWIND $rows AS row CREATE (n:{label}) SET n = row", rows=rows)
+            await result.consume()
+
+    async def close(self):
+        if self.driver:
+            await self.driver.close()
+            self.driver = None
+
+
+class AsyncClickhouseClient(AsyncDatabaseClient):
+    pool: Optional[object] = None
+
+    async def connect(self):
+        import asynch
+
+        self.pool = await asynch.create_pool(minsize=1, maxsize=self.pool_size, dsn=self.connection_string)
+
+    async def insert_data(self, table_name: str, data: list[dict]):
+        if not data:
+            return
+        columns = ", ".join(data[0].keys())
+        async with self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(f"INSERT INTO {table_name} ({columns}) VALUES", [tuple(r.values()) for r in data])
+
+    async def close(self):
+        if self.pool:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+
+class AsyncMSSQLClient(AsyncDatabaseClient):
+    """pyodbc has no asyncio API, so batches run on worker threads through the sync client."""
+    client: Optional[object] = None
+
+    async def connect(self):
+        from .mssql_client import MSSQLClient
+
+        self.client = MSSQLClient(connection_string=self.connection_string, pool_size=self.pool_size, max_overflow=0)
+        await asyncio.to_thread(self.client.connect)
+
+    async def insert_data(self, table_name: str, data: list[dict]):
+        await asyncio.to_thread(self.client.insert_data, table_name, data)
+
+    async def close(self):
+        if self.client:
+            self.client.close()
+            self.client = None
+
+
+ASYNC_CLIENT_CLASSES = {
+    "postgres": AsyncPostgreSQLClient,
+    "mongo": AsyncMongoDBClient,
+    "neo4j": AsyncNeo4jClient,
+    "clickhouse": AsyncClickhouseClient,
+    "mssql": AsyncMSSQLClient,
+}
+
+
+def async_client(name: str, settings: DatabaseSettings, pool_size: int) -> AsyncDatabaseClient:
+    return ASYNC_CLIENT_CLASSES[name](connection_string=settings.url(name), pool_size=pool_size)
@@ -1,5 +1,7 @@
-from typing import Optional
-from clickhouse_driver import Client as ClickHouseDriver
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
 from .database_client import DatabaseClient
 
 
@@ -15,15 +17,62 @@ def transform_record(record):
     return record
 
 
+class DriverPool:
+    """clickhouse_driver.Client is a single connection that two threads must not share,
+    so each caller checks one out. At most `size` drivers exist; callers beyond that
+    wait up to `timeout` seconds for one to be returned."""
+
+    def __init__(self, factory: Callable[[], object], size: int, timeout: float):
+        self.factory = factory
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._drivers = []
+
+    @contextmanager
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No ClickHouse connection free within {self.timeout}s")
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self.factory()
+                with self._lock:
+                    self._drivers.append(driver)
+            try:
+                yield driver
+            finally:
+                # The driver reconnects by itself after a network error, so it is always reusable.
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            driver.disconnect()
+
+
 class ClickhouseClient(DatabaseClient):
-    client: Optional[ClickHouseDriver] = None
+    pool: Optional[DriverPool] = None
 
     def connect(self):
-        self.client = ClickHouseDriver.from_url(self.connection_string)
+        from clickhouse_driver import Client as ClickHouseDriver
 
-    def insert_data(self, table_name: str, data: list[dict]):
-        if not self.client:
+        self.pool = DriverPool(lambda: ClickHouseDriver.from_url(self.connection_string),
+                               self.pool_size + self.max_overflow, self.pool_timeout)
+
+    def execute(self, query: str, params=None, **kwargs):
+        """Run a query on a driver of its own, so threads can share this client."""
+        if not self.pool:
             self.connect()
+        with self.pool.acquire() as driver:
+            return driver.execute(query, params, **kwargs)
+
+    def insert_data(self, table_name: str, data: list[dict]):
         if not data:
             return
         # Prepare query: extract columns and create a tuple list of values
@@ -31,13 +80,24 @@ class ClickhouseClient(DatabaseClient):
         columns = ", ".join(keys)
         values = [tuple(d[k] for k in keys) for d in data]
         query = f"INSERT INTO {table_name} ({transform_record(columns)}) VALUES"
-        self.client.execute(query, values)
+        self.execute(query, values)
+
+    def upsert_data(self, table_name: str, data: list[dict], key_columns: list[str]):
+        """Insert rows; tables are ReplacingMergeTree ordered by their key, so later rows replace earlier ones.
+
+        Duplicates are collapsed by background merges, so readers that need exact results use FINAL.
+        """
+        self.insert_data(table_name, data)
 
     def test_connection(self) -> bool:
         try:
-            self.connect()
-            self.client.execute("SELECT 1")
+            self.execute("SELECT 1")
             return True
         except Exception as e:
             print(f"ClickHouse connection test failed: {e}")
             return False
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool = None
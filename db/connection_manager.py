@@ -0,0 +1,91 @@
+import importlib
+import threading
+from typing import Optional
+
+from .config import DatabaseSettings
+from .database_client import DatabaseClient
+
+# Client classes are imported on first use, so a missing driver only affects its own store.
+CLIENT_CLASSES = {
+    "postgres": ("db.postgre_sql_client", "PostgreSQLClient"),
+    "mongo": ("db.mongo_db_client", "MongoDBClient"),
+    "neo4j": ("db.neo4j_client", "Neo4jClient"),
+    "clickhouse": ("db.clickhouse_client", "ClickhouseClient"),
+    "mssql": ("db.mssql_client", "MSSQLClient"),
+}
+
+
+class ConnectionManager:
+    """One lazily connected client per database, shared by every thread that asks for it.
+
+    Pools are sized for `workers` concurrent users (plus the configured overflow),
+    clients connect on first use, and close() releases every pool that was opened.
+    """
+
+    def __init__(self, settings: Optional[DatabaseSettings] = None, workers: Optional[int] = None):
+        self.settings = settings or DatabaseSettings.from_env()
+        self.pool_size = max(self.settings.pool_size, workers or 0)
+        self._clients: dict[str, DatabaseClient] = {}
+        # Further clients by (database, url), e.g. read replicas and shards.
+        self._extra_clients: dict[tuple[str, str], DatabaseClient] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> list[str]:
+        return list(CLIENT_CLASSES)
+
+    def client(self, name: str) -> DatabaseClient:
+        """The shared client for a database, connecting it on the first call."""
+        if name not in CLIENT_CLASSES:
+            raise KeyError(f"Unknown database '{name}'. Available: {', '.join(CLIENT_CLASSES)}")
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = self._connect(name, self.settings.url(name))
+            return self._clients[name]
+
+    def client_at(self, name: str, url: str) -> DatabaseClient:
+        """A shared client of the same kind for another server, such as a read replica or a shard."""
+        if name not in CLIENT_CLASSES:
+            raise KeyError(f"Unknown database '{name}'. Available: {', '.join(CLIENT_CLASSES)}")
+        with self._lock:
+            if (name, url) not in self._extra_clients:
+                self._extra_clients[(name, url)] = self._connect(name, url)
+            return self._extra_clients[(name, url)]
+
+    def _connect(self, name: str, url: str) -> DatabaseClient:
+        module_name, class_name = CLIENT_CLASSES[name]
+        client_class = getattr(importlib.import_module(module_name), class_name)
+        client = client_class(
+            connection_string=url,
+            pool_size=self.pool_size,
+            max_overflow=self.settings.max_overflow,
+            pool_timeout=self.settings.pool_timeout,
+            pool_recycle=self.settings.pool_recycle,
+        )
+        client.connect()
+        return client
+
+    def connected(self) -> list[str]:
+        with self._lock:
+            return list(self._clients)
+
+    def health_check(self, names: Optional[list[str]] = None) -> dict[str, bool]:
+        """Run each client's connection test; defaults to the clients already in use."""
+        return {name: self.client(name).test_connection() for name in (names or self.connected())}
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            extra, self._extra_clients = self._extra_clients, {}
+        clients.update({f"{name} at {url}": client for (name, url), client in extra.items()})
+        for name, client in clients.items():
+            try:
+                client.close()
+            except Exception as e:
+                print(f"Error closing {name} connection: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -2,8 +2,27 @@ from abc import ABC, abstractmethod
 from pydantic import BaseModel
 
 
+def dedupe_rows(data: list[dict], key_columns: list[str]) -> list[dict]:
+    """Keep the last row for each key, so a batch never updates the same row twice."""
+    latest = {tuple(record[k] for k in key_columns): record for record in data}
+    return list(latest.values()) if len(latest) < len(data) else data
+
+
+class PartialWriteError(Exception):
+    """A batch write that is not atomic failed for some rows; every row not in `failed` was written."""
+
+    def __init__(self, failed: dict[int, str]):
+        self.failed = failed  # row index in the batch -> error message
+        super().__init__(f"{len(failed)} rows failed, first: {next(iter(failed.values()), '')}")
+
+
 class DatabaseClient(BaseModel, ABC):
     connection_string: str
+    # Connection pool limits; size them to the number of threads sharing the client.
+    pool_size: int = 5
+    max_overflow: int = 5
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
 
     class Config:
         arbitrary_types_allowed = True
@@ -18,7 +37,17 @@ class DatabaseClient(BaseModel, ABC):
         """Insert data into the database."""
         raise NotImplementedError
 
+    @abstractmethod
+    def upsert_data(self, table_name: str, data: list[dict], key_columns: list[str]):
+        """Insert rows, replacing existing ones that match on key_columns."""
+        raise NotImplementedError
+
     @abstractmethod
     def test_connection(self) -> bool:
         """Test the database connection."""
         raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        """Release the connection pool."""
+        raise NotImplementedError
@@ -1,30 +1,67 @@
 from typing import Optional
-from pymongo import MongoClient
-from .database_client import DatabaseClient
+from pydantic import Field
+from pymongo import MongoClient, UpdateOne, ASCENDING
+from pymongo.errors import BulkWriteError
+from .database_client import DatabaseClient, PartialWriteError, dedupe_rows
 
 
 class MongoDBClient(DatabaseClient):
     client: Optional[MongoClient] = None
     db: Optional[object] = None
+    indexed: set = Field(default_factory=set)
 
     class Config:
         arbitrary_types_allowed = True
 
     def connect(self):
-        self.client = MongoClient(self.connection_string)
+        self.client = MongoClient(self.connection_string, maxPoolSize=self.pool_size + self.max_overflow,
+                                  waitQueueTimeoutMS=int(self.pool_timeout * 1000),
+                                  maxIdleTimeMS=self.pool_recycle * 1000)
         self.db = self.client.get_database("data-hw1")
 
     def insert_data(self, collection_name: str, data: list[dict]):
         if not self.client:
             self.connect()
         collection = self.db[collection_name]
-        collection.insert_many(data)
+        # Unordered, so one bad document does not stop the rest; report exactly which ones failed.
+        try:
+            collection.insert_many(data, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors")
+            if not write_errors:
+                raise
+            raise PartialWriteError({error["index"]: error["errmsg"] for error in write_errors}) from e
+
+    def upsert_data(self, collection_name: str, data: list[dict], key_columns: list[str]):
+        """Replace documents matched on key_columns with one unordered bulk_write."""
+        if not self.client:
+            self.connect()
+        if not data:
+            return
+        collection = self.db[collection_name]
+        index = (collection_name, tuple(key_columns))
+        if index not in self.indexed:
+            # Without an index on the key every upsert would scan the collection.
+            collection.create_index([(name, ASCENDING) for name in key_columns])
+            self.indexed.add(index)
+        operations = [
+            UpdateOne({name: record[name] for name in key_columns}, {"$set": record}, upsert=True)
+            for record in dedupe_rows(data, key_columns)
+        ]
+        collection.bulk_write(operations, ordered=False)
 
     def test_connection(self) -> bool:
         try:
-            self.connect()
+            if not self.client:
+                self.connect()
             self.client.admin.command('ping')
             return True
         except Exception as e:
             print(f"MongoDB connection test failed: {e}")
             return False
+
+    def close(self):
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.db = None
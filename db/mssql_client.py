@@ -1,32 +1,192 @@
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
 from typing import Optional
-from sqlalchemy import create_engine, Table, MetaData
+from pydantic import Field
+from sqlalchemy import create_engine, Table, MetaData, Column, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
-from .database_client import DatabaseClient
+from .database_client import DatabaseClient, dedupe_rows
+
+BCP_FIELD_TERMINATOR = "|~|"
+BCP_ROW_TERMINATOR = "|~~|\n"
+
+INIT_MSSQL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "init_mssql.sql")
+
+
+def parse_column_types(schema_path: str = INIT_MSSQL_PATH) -> dict[str, dict[str, tuple[str, int, int]]]:
+    """Read (type, size, scale) for every column declared in a CREATE TABLE script."""
+    with open(schema_path) as f:
+        sql = f.read()
+    tables = {}
+    for match in re.finditer(r"CREATE\s+TABLE\s+(?:\w+\.)?(\w+)\s*\((.*?)\n\);", sql, re.DOTALL | re.IGNORECASE):
+        columns = {}
+        for line in match.group(2).splitlines():
+            column = re.match(r"\s*(\w+)\s+([A-Za-z]+)(?:\((\d+)(?:\s*,\s*(\d+))?\))?", line)
+            if not column or column.group(1).upper() == "CONSTRAINT":
+                continue
+            name, sql_type, size, scale = column.groups()
+            columns[name] = (sql_type.upper(), int(size or 0), int(scale or 0))
+        tables[match.group(1)] = columns
+    return tables
+
+
+def input_size(sql_type: str, size: int, scale: int):
+    """pyodbc setinputsizes entry for a declared column type."""
+    import pyodbc
+
+    if sql_type in ("INT", "INTEGER"):
+        return pyodbc.SQL_INTEGER, 0, 0
+    if sql_type == "BIGINT":
+        return pyodbc.SQL_BIGINT, 0, 0
+    if sql_type in ("DECIMAL", "NUMERIC"):
+        return pyodbc.SQL_DECIMAL, size or 18, scale
+    if sql_type in ("FLOAT", "REAL"):
+        return pyodbc.SQL_DOUBLE, 0, 0
+    if sql_type in ("NVARCHAR", "NCHAR"):
+        return pyodbc.SQL_WVARCHAR, size or 4000, 0
+    if sql_type in ("VARCHAR", "CHAR"):
+        return pyodbc.SQL_VARCHAR, size or 8000, 0
+    return None
+
+
+def clean_value(value):
+    # pandas hands missing values over as NaN, which SQL Server rejects.
+    return None if isinstance(value, float) and math.isnan(value) else value
 
 
 class MSSQLClient(DatabaseClient):
     engine: Optional[object] = None
     Session: Optional[object] = None
+    # Bind whole parameter arrays per round trip instead of one row at a time.
+    fast_executemany: bool = True
+    schema_path: str = INIT_MSSQL_PATH
+    # Batches with at least this many rows are loaded with the bcp utility when it is installed.
+    bcp_threshold: Optional[int] = None
+    column_types: dict = Field(default_factory=dict)
 
     def connect(self):
-        self.engine = create_engine(self.connection_string)
+        self.engine = create_engine(self.connection_string, fast_executemany=self.fast_executemany,
+                                    pool_size=self.pool_size, max_overflow=self.max_overflow,
+                                    pool_timeout=self.pool_timeout, pool_recycle=self.pool_recycle, pool_pre_ping=True)
         self.Session = sessionmaker(bind=self.engine)
+        if not self.column_types and os.path.exists(self.schema_path):
+            self.column_types = parse_column_types(self.schema_path)
+
+    def input_sizes(self, table_name: str, columns: list[str]) -> Optional[list]:
+        """Typed parameter declarations for the columns, if every one is declared in the schema."""
+        declared = self.column_types.get(table_name.lstrip("#").removesuffix("_stage"), {})
+        sizes = [input_size(*declared[name]) if name in declared else None for name in columns]
+        return sizes if all(sizes) else None
+
+    def bulk_insert(self, connection, table_name: str, data: list[dict]):
+        """Insert rows over an open connection with a single fast_executemany call."""
+        columns = list(data[0].keys())
+        rows = [tuple(clean_value(record[name]) for name in columns) for record in data]
+        query = (f"INSERT INTO [{table_name}] ({', '.join(f'[{name}]' for name in columns)}) "
+                 f"VALUES ({', '.join('?' for _ in columns)})")
+        cursor = connection.connection.cursor()
+        try:
+            cursor.fast_executemany = self.fast_executemany
+            sizes = self.input_sizes(table_name, columns)
+            if sizes:
+                cursor.setinputsizes(sizes)
+            cursor.executemany(query, rows)
+        finally:
+            cursor.close()
+
+    def bcp_insert(self, table_name: str, data: list[dict]):
+        """Load rows through the bcp utility from a delimited staging file.
+
+        The file goes in as a single batch that stops at the first bad row, so a failed
+        run commits nothing and the whole batch can be retried without duplicates.
+        """
+        url = make_url(self.connection_string)
+        table_columns = list(Table(table_name, MetaData(), autoload_with=self.engine).c.keys())
+        columns = list(data[0].keys())
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, f"{table_name}.dat")
+            # Multi-character terminators, so tabs and newlines inside titles need no escaping.
+            with open(data_path, "w", newline="", encoding="utf-8") as f:
+                for record in data:
+                    values = (clean_value(record[name]) for name in columns)
+                    f.write(BCP_FIELD_TERMINATOR.join("" if v is None else str(v) for v in values))
+                    f.write(BCP_ROW_TERMINATOR)
+            format_path = os.path.join(tmp, f"{table_name}.fmt")
+            with open(format_path, "w") as f:
+                # Non-XML format file mapping each field in the file to the table column of the same name.
+                f.write(f"14.0\n{len(columns)}\n")
+                for i, name in enumerate(columns, start=1):
+                    terminator = BCP_ROW_TERMINATOR if i == len(columns) else BCP_FIELD_TERMINATOR
+                    terminator = terminator.replace("\n", "\\n")
+                    f.write(f'{i} SQLCHAR 0 0 "{terminator}" {table_columns.index(name) + 1} {name} ""\n')
+            subprocess.run(
+                ["bcp", f"dbo.{table_name}", "in", data_path, "-f", format_path, "-C", "65001",
+                 "-S", f"{url.host},{url.port or 1433}", "-U", url.username, "-P", url.password,
+                 "-d", url.database or "master", "-m", "1", "-h", "TABLOCK"],
+                check=True, capture_output=True, text=True,
+            )
+
+    def use_bcp(self, data: list[dict]) -> bool:
+        return self.bcp_threshold is not None and len(data) >= self.bcp_threshold and shutil.which("bcp") is not None
 
     def insert_data(self, table_name: str, data: list[dict]):
         if not self.engine:
             self.connect()
-        metadata = MetaData()
-        table = Table(table_name, metadata, autoload_with=self.engine)
-        with self.engine.connect() as connection:
-            connection.execute(table.insert(), data)
+        if not data:
+            return
+        if self.use_bcp(data):
+            self.bcp_insert(table_name, data)
+            return
+        # engine.begin() commits on exit; a plain connect() rolls the rows back when it closes.
+        with self.engine.begin() as connection:
+            self.bulk_insert(connection, table_name, data)
+
+    def upsert_data(self, table_name: str, data: list[dict], key_columns: list[str]):
+        """Bulk-load rows into a #temp table, then MERGE them into the target."""
+        if not self.engine:
+            self.connect()
+        if not data:
+            return
+        data = dedupe_rows(data, key_columns)
+        table = Table(table_name, MetaData(), autoload_with=self.engine)
+        stage, merge = self.merge_statements(table, list(data[0].keys()), key_columns)
+        with self.engine.begin() as connection:
+            stage.create(connection)
+            self.bulk_insert(connection, stage.name, data)
+            connection.execute(text(merge))
+            stage.drop(connection)
+
+    @staticmethod
+    def merge_statements(table: Table, columns: list[str], key_columns: list[str]) -> tuple[Table, str]:
+        """The #temp staging table for a batch and the MERGE moving it into table."""
+        stage = Table(f"#{table.name}_stage", MetaData(), *[Column(name, table.c[name].type) for name in columns])
+        match = " AND ".join(f"t.[{name}] = s.[{name}]" for name in key_columns)
+        updates = ", ".join(f"t.[{name}] = s.[{name}]" for name in columns if name not in key_columns)
+        merge = (
+            f"MERGE INTO [{table.name}] WITH (HOLDLOCK) AS t USING [{stage.name}] AS s ON {match} "
+            + (f"WHEN MATCHED THEN UPDATE SET {updates} " if updates else "")
+            + f"WHEN NOT MATCHED THEN INSERT ({', '.join(f'[{name}]' for name in columns)}) "
+            f"VALUES ({', '.join(f's.[{name}]' for name in columns)});"
+        )
+        return stage, merge
 
     def test_connection(self) -> bool:
         try:
-            self.connect()
+            if not self.engine:
+                self.connect()
             with self.engine.connect() as connection:
-                connection.execute("SELECT 1")
+                connection.execute(text("SELECT 1"))
             return True
         except Exception as e:
             print(f"MSSQL connection test failed: {e}")
             return False
+
+    def close(self):
+        if self.engine:
+            self.engine.dispose()
+            self.engine = None
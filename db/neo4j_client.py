@@ -1,14 +1,19 @@
 from typing import Optional
+from pydantic import Field
 from neo4j import GraphDatabase, basic_auth
-from db.database_client import DatabaseClient
 from bson import ObjectId
+from .database_client import DatabaseClient, dedupe_rows
 
 
 class Neo4jClient(DatabaseClient):
     driver: Optional[object] = None
+    indexed: set = Field(default_factory=set)
 
     def connect(self):
-        self.driver = GraphDatabase.driver(self.connection_string, auth=basic_auth("neo4j", "your_password"))
+        self.driver = GraphDatabase.driver(self.connection_string, auth=basic_auth("neo4j", "your_password"),
+                                           max_connection_pool_size=self.pool_size + self.max_overflow,
+                                           connection_acquisition_timeout=self.pool_timeout,
+                                           max_connection_lifetime=self.pool_recycle)
 
     @staticmethod
     def sanitize_record(record: dict) -> dict:
@@ -24,18 +29,45 @@ class Neo4jClient(DatabaseClient):
     def insert_data(self, label: str, data: list[dict]):
         if not self.driver:
             self.connect()
+        # One transaction per batch, so a failed batch leaves nothing behind and can be retried or split.
         with self.driver.session() as session:
-            for record in data:
-                clean_record = Neo4jClient.sanitize_record(record)
-                cypher_query = f"CREATE (n:{label} $props)"
-                session.run(cypher_query, props=clean_record)
+            with session.begin_transaction() as tx:
+                for record in data:
+                    clean_record = Neo4jClient.sanitize_record(record)
+                    cypher_query = f"CREATE (n:{label} $props)"
+                    tx.run(cypher_query, props=clean_record)
+                tx.commit()
+
+    def upsert_data(self, label: str, data: list[dict], key_columns: list[str]):
+        """MERGE nodes on key_columns for the whole batch in one UNWIND statement."""
+        if not self.driver:
+            self.connect()
+        if not data:
+            return
+        rows = [Neo4jClient.sanitize_record(record) for record in dedupe_rows(data, key_columns)]
+        with self.driver.session() as session:
+            index = (label, tuple(key_columns))
+            if index not in self.indexed:
+                # MERGE looks nodes up by key; without an index that is a label scan per row.
+                properties = ", ".join(f"n.{name}" for name in key_columns)
+                session.run(f"CREATE INDEX {label.lower()}_{'_'.join(key_columns)}_idx IF NOT EXISTS "
+                            f"FOR (n:{label}) ON ({properties})")
+                self.indexed.add(index)
+            key = ", ".join(f"{name}: row.{name}" for name in key_columns)
+            session.run(f"UNWIND $rows AS row MERGE (n:{label} {{{key}}}) SET n += row", rows=rows)
 
     def test_connection(self) -> bool:
         try:
-            self.connect()
+            if not self.driver:
+                self.connect()
             with self.driver.session() as session:
                 session.run("RETURN 1")
             return True
         except Exception as e:
             print(f"Neo4j connection test failed: {e}")
             return False
+
+    def close(self):
+        if self.driver:
+            self.driver.close()
+            self.driver = None
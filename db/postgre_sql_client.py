@@ -1,8 +1,9 @@
 from typing import Optional
-from sqlalchemy import create_engine, Table, MetaData
+from sqlalchemy import create_engine, Table, MetaData, Column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
 
-from .database_client import DatabaseClient
+from .database_client import DatabaseClient, dedupe_rows
 
 
 class PostgreSQLClient(DatabaseClient):
@@ -10,7 +11,8 @@ class PostgreSQLClient(DatabaseClient):
     Session: Optional[object] = None
 
     def connect(self):
-        self.engine = create_engine(self.connection_string)
+        self.engine = create_engine(self.connection_string, pool_size=self.pool_size, max_overflow=self.max_overflow,
+                                    pool_timeout=self.pool_timeout, pool_recycle=self.pool_recycle, pool_pre_ping=True)
         self.Session = sessionmaker(bind=self.engine)
 
     def insert_data(self, table_name: str, data: list[dict]):
@@ -22,12 +24,46 @@ class PostgreSQLClient(DatabaseClient):
         with self.engine.begin() as connection:
             connection.execute(table.insert(), data)
 
+    def upsert_data(self, table_name: str, data: list[dict], key_columns: list[str]):
+        """Bulk-load rows into a temporary staging table, then INSERT ... ON CONFLICT into the target."""
+        if not self.engine:
+            self.connect()
+        if not data:
+            return
+        data = dedupe_rows(data, key_columns)
+        table = Table(table_name, MetaData(), autoload_with=self.engine)
+        stage, statement = self.upsert_statements(table, list(data[0].keys()), key_columns)
+        with self.engine.begin() as connection:
+            stage.create(connection)
+            connection.execute(stage.insert(), data)
+            connection.execute(statement)
+
+    @staticmethod
+    def upsert_statements(table: Table, columns: list[str], key_columns: list[str]):
+        """The temporary staging table for a batch and the INSERT ... ON CONFLICT moving it into table."""
+        stage = Table(f"{table.name}_stage", MetaData(),
+                      *[Column(name, table.c[name].type) for name in columns],
+                      prefixes=["TEMPORARY"], postgresql_on_commit="DROP")
+        statement = pg_insert(table).from_select(columns, select(*stage.c))
+        updates = {name: statement.excluded[name] for name in columns if name not in key_columns}
+        if updates:
+            statement = statement.on_conflict_do_update(index_elements=key_columns, set_=updates)
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+        return stage, statement
+
     def test_connection(self) -> bool:
         try:
-            self.connect()
+            if not self.engine:
+                self.connect()
             with self.engine.connect() as connection:
-                connection.execute("SELECT 1")
+                connection.execute(text("SELECT 1"))
             return True
         except Exception as e:
             print(f"PostgreSQL connection test failed: {e}")
             return False
+
+    def close(self):
+        if self.engine:
+            self.engine.dispose()
+            self.engine = None
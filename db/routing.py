@@ -0,0 +1,204 @@
+import itertools
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import MetaData, Table, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from metrics import REGISTRY, MetricsRegistry
+
+# Seconds of replay lag on a PostgreSQL standby; 0 when it has replayed everything it
+# received (an idle standby is not stale) and NULL on a primary.
+REPLICA_LAG_QUERY = text("""
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+""")
+
+STRATEGIES = ("round_robin", "least_latency")
+
+
+def replica_lag(engine: Engine) -> float:
+    """Replication lag of engine in seconds; other databases have no replicas and report 0."""
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    with engine.connect() as conn:
+        lag = conn.execute(REPLICA_LAG_QUERY).scalar()
+    return float(lag or 0)
+
+
+class ReplicaSet:
+    """Spreads read-only queries over replica engines, falling back to the primary.
+
+    A replica is used only while its replication lag, checked at most every
+    `check_interval` seconds, is within `max_lag`, and is skipped for
+    `check_interval` after a failed query. round_robin rotates through the
+    fresh replicas; least_latency picks the lowest smoothed query latency,
+    sampling each replica `min_samples` times first.
+    """
+
+    def __init__(self, primary: Engine, replicas: Iterable[Engine] = (), strategy: str = "round_robin",
+                 max_lag: float = 30.0, check_interval: float = 5.0, min_samples: int = 5,
+                 smoothing: float = 0.2, lag: Callable[[Engine], float] = replica_lag,
+                 registry: MetricsRegistry = REGISTRY):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown replica strategy '{strategy}'. Available: {', '.join(STRATEGIES)}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self._lag = lag
+        self._checked: dict[int, tuple[float, bool]] = {}
+        self._ewma: dict[int, float] = {}
+        self._samples: dict[int, int] = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self.reads = registry.counter("db_replica_reads_total", "Read queries per target", ("target",))
+
+    def name(self, engine: Engine) -> str:
+        return "primary" if engine is self.primary else f"replica{self.replicas.index(engine)}"
+
+    def is_fresh(self, index: int) -> bool:
+        """Whether replica index is reachable and within max_lag, re-checked every check_interval."""
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(index)
+        if checked is not None and now - checked[0] < self.check_interval:
+            return checked[1]
+        try:
+            fresh = self._lag(self.replicas[index]) <= self.max_lag
+        except Exception as e:
+            print(f"Replica lag check failed on replica{index}: {e}")
+            fresh = False
+        with self._lock:
+            self._checked[index] = (now, fresh)
+        return fresh
+
+    def mark_failed(self, engine: Engine):
+        if engine is not self.primary:
+            with self._lock:
+                self._checked[self.replicas.index(engine)] = (time.monotonic(), False)
+
+    def read_engine(self) -> Engine:
+        fresh = [i for i in range(len(self.replicas)) if self.is_fresh(i)]
+        if not fresh:
+            return self.primary
+        if self.strategy == "round_robin":
+            return self.replicas[fresh[next(self._turn) % len(fresh)]]
+        with self._lock:
+            for i in fresh:
+                if self._samples.get(i, 0) < self.min_samples:
+                    return self.replicas[i]
+            return self.replicas[min(fresh, key=lambda i: self._ewma[i])]
+
+    def _record(self, engine: Engine, elapsed: float):
+        if engine is self.primary:
+            return
+        index = self.replicas.index(engine)
+        with self._lock:
+            previous = self._ewma.get(index)
+            self._ewma[index] = elapsed if previous is None else \
+                self.smoothing * elapsed + (1 - self.smoothing) * previous
+            self._samples[index] = self._samples.get(index, 0) + 1
+
+    @contextmanager
+    def connect(self):
+        """A connection for read-only queries, timed for least_latency routing."""
+        engine = self.read_engine()
+        self.reads.inc(target=self.name(engine))
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                yield conn
+        except OperationalError:
+            self.mark_failed(engine)
+            raise
+        self._record(engine, time.perf_counter() - start)
+
+
+def shard_of(user_id: int, shards: int) -> int:
+    """Stable shard number for a user_id; crc32 rather than hash() so every process agrees."""
+    return zlib.crc32(str(user_id).encode()) % shards
+
+
+class ShardMap:
+    """Maps user_ids to the engine holding their ratings when `ratings` is sharded by user_id hash."""
+
+    def __init__(self, engines: Iterable[Engine]):
+        self.engines = list(engines)
+        if not self.engines:
+            raise ValueError("A shard map needs at least one shard")
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def engine_for(self, user_id: int) -> Engine:
+        return self.engines[shard_of(user_id, len(self.engines))]
+
+    def group(self, user_ids: Iterable[int]) -> dict[int, list[int]]:
+        """user_ids by shard number, so a batch lookup runs one query per shard."""
+        groups: dict[int, list[int]] = {}
+        for user_id in user_ids:
+            groups.setdefault(shard_of(user_id, len(self.engines)), []).append(user_id)
+        return groups
+
+
+def distribute_ratings(primary: Engine, shards: ShardMap, table_name: str = "ratings",
+                       chunk_size: int = 100_000) -> list[int]:
+    """Copy the primary's ratings to the shards, each user's rows to shard_of(user_id).
+
+    Every shard's copy is replaced in a single transaction, so readers see either the
+    previous load or this one. Returns the number of rows written to each shard.
+    """
+    table = Table(table_name, MetaData(), autoload_with=primary)
+    counts = [0] * len(shards)
+    placement: dict[int, int] = {}
+    with ExitStack() as stack:
+        targets = []
+        for engine in shards.engines:
+            conn = stack.enter_context(engine.begin())
+            table.create(conn, checkfirst=True)
+            conn.execute(table.delete())
+            targets.append(conn)
+        with primary.connect() as source:
+            result = source.execution_options(stream_results=True).execute(select(table))
+            for rows in result.partitions(chunk_size):
+                groups: dict[int, list[dict]] = {}
+                for row in rows:
+                    user_id = row.user_id
+                    if user_id not in placement:
+                        placement[user_id] = shard_of(user_id, len(shards))
+                    groups.setdefault(placement[user_id], []).append(dict(row._mapping))
+                for shard, batch in groups.items():
+                    targets[shard].execute(table.insert(), batch)
+                    counts[shard] += len(batch)
+    return counts
+
+
+def sync_ratings_shards(connections, settings) -> Optional[list[int]]:
+    """distribute_ratings to the RATINGS_SHARD_URLS databases; None when ratings are not sharded."""
+    if not settings.ratings_shard_urls:
+        return None
+    shards = ShardMap(connections.client_at("postgres", url).engine for url in settings.ratings_shard_urls)
+    counts = distribute_ratings(connections.client("postgres").engine, shards)
+    print("Ratings shards refreshed: " + ", ".join(f"{count} rows on shard {i}" for i, count in enumerate(counts)))
+    return counts
+
+
+def build_routing(connections, settings) -> tuple[ReplicaSet, Optional[ShardMap]]:
+    """The PostgreSQL replica set and, when shard URLs are configured, the ratings shard map."""
+    primary = connections.client("postgres").engine
+    replicas = [connections.client_at("postgres", url).engine for url in settings.postgres_replica_urls]
+    replica_set = ReplicaSet(primary, replicas, strategy=settings.replica_strategy,
+                             max_lag=settings.max_replica_lag)
+    shards = ShardMap(connections.client_at("postgres", url).engine for url in settings.ratings_shard_urls) \
+        if settings.ratings_shard_urls else None
+    return replica_set, shards
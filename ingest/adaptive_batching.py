@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+from typing import Optional
+
+
+class AdaptiveBatchSizer:
+    """AIMD controller for one sink's batch size.
+
+    After every batch the measured throughput (rows/s) is compared with the
+    smoothed throughput of previous batches. While it keeps up, the batch size
+    grows by a fixed step (additive increase); when throughput drops, a batch
+    exceeds the latency target, or a write fails, the size is cut by a factor
+    (multiplicative decrease). The size never leaves [min_size, max_size] and
+    never exceeds what fits in max_batch_bytes at the observed row width.
+    """
+
+    def __init__(self, initial: int = 1000, min_size: int = 50, max_size: int = 200_000,
+                 increase_step: Optional[int] = None, decrease_factor: float = 0.5,
+                 tolerance: float = 0.1, target_latency: Optional[float] = None,
+                 max_batch_bytes: int = 64 * 1024 * 1024, smoothing: float = 0.3):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.increase_step = increase_step or max(initial // 2, min_size)
+        self.decrease_factor = decrease_factor
+        self.tolerance = tolerance
+        self.target_latency = target_latency
+        self.max_batch_bytes = max_batch_bytes
+        self.smoothing = smoothing
+        self.throughput: Optional[float] = None
+        self.row_bytes: Optional[float] = None
+        self.size = self._clamp(initial)
+
+    def _clamp(self, size: float) -> int:
+        limit = self.max_size
+        if self.row_bytes:
+            limit = min(limit, int(self.max_batch_bytes / self.row_bytes))
+        return int(max(self.min_size, min(size, limit)))
+
+    def observe_row_bytes(self, row_bytes: float):
+        """Update the row width estimate used for the memory limit."""
+        if row_bytes <= 0:
+            return
+        self.row_bytes = row_bytes if self.row_bytes is None else \
+            self.smoothing * row_bytes + (1 - self.smoothing) * self.row_bytes
+        self.size = self._clamp(self.size)
+
+    def record(self, rows: int, elapsed: float, failed: bool = False) -> int:
+        """Feed back one batch result and return the next batch size."""
+        if failed:
+            self.size = self._clamp(self.size * self.decrease_factor)
+            return self.size
+        if rows <= 0 or elapsed <= 0:
+            return self.size
+        throughput = rows / elapsed
+        too_slow = self.target_latency is not None and elapsed > self.target_latency
+        # Batches smaller than the current size (end of file) say little about the size itself.
+        if rows < self.size and not too_slow:
+            return self.size
+        if too_slow or (self.throughput is not None and throughput < self.throughput * (1 - self.tolerance)):
+            self.size = self._clamp(self.size * self.decrease_factor)
+        else:
+            self.size = self._clamp(self.size + self.increase_step)
+        self.throughput = throughput if self.throughput is None else \
+            self.smoothing * throughput + (1 - self.smoothing) * self.throughput
+        return self.size
+
+
+class BatchSizeStore:
+    """Per-sink, per-table batch sizes persisted as JSON so the next run starts warm."""
+
+    def __init__(self, path: Optional[str] = None, **sizer_options):
+        self.path = path
+        self.sizer_options = sizer_options
+        self.saved: dict[str, dict[str, int]] = {}
+        self.sizers: dict[tuple[str, str], AdaptiveBatchSizer] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.saved = json.load(f)
+
+    def sizer(self, sink: str, table: str, initial: int, **overrides) -> AdaptiveBatchSizer:
+        with self._lock:
+            key = (sink, table)
+            if key not in self.sizers:
+                start = self.saved.get(sink, {}).get(table, initial)
+                self.sizers[key] = AdaptiveBatchSizer(initial=start, **{**self.sizer_options, **overrides})
+            return self.sizers[key]
+
+    def sizes(self) -> dict[str, dict[str, int]]:
+        result: dict[str, dict[str, int]] = {sink: dict(tables) for sink, tables in self.saved.items()}
+        for (sink, table), sizer in self.sizers.items():
+            result.setdefault(sink, {})[table] = sizer.size
+        return result
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.sizes(), f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+from functools import partial
+from typing import Optional
+
+from db.async_clients import AsyncDatabaseClient, async_client
+from db.config import DatabaseSettings
+from ingest.dead_letter import DeadLetterQueue, bisect_batch_async, is_row_error
+from ingest.mmap_reader import MmapCSVReader
+
+
+class AsyncIngestEngine:
+    """Single-process asyncio loader: every sink keeps up to `inflight` batches in flight.
+
+    CSV parsing runs on a worker thread while the event loop drives the async
+    drivers. A per-sink semaphore bounds the batches in flight, and when any sink
+    is saturated the reader waits, so memory stays bounded by inflight x chunk_size.
+    """
+
+    def __init__(self, sink_names: list[str], settings: DatabaseSettings, metrics, chunk_size: int = 1000,
+                 inflight: int = 4, max_retries: int = 0, retry_backoff: float = 1.0,
+                 clients: Optional[dict[str, AsyncDatabaseClient]] = None,
+                 dead_letters: Optional[DeadLetterQueue] = None):
+        from data_pipeline import SINK_CLIENTS
+
+        self.sink_clients = {db_name: SINK_CLIENTS[db_name] for db_name in sink_names}
+        self.settings = settings
+        self.metrics = metrics
+        self.chunk_size = chunk_size
+        self.inflight = inflight
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.clients = clients or {}
+        self.dead_letters = dead_letters
+        self.failed_rows = 0
+
+    async def connect(self):
+        for db_name, name in self.sink_clients.items():
+            if db_name not in self.clients:
+                self.clients[db_name] = async_client(name, self.settings, self.inflight)
+        await asyncio.gather(*(client.connect() for client in self.clients.values()))
+
+    async def close(self):
+        await asyncio.gather(*(client.close() for client in self.clients.values()), return_exceptions=True)
+
+    async def write(self, db_name: str, table_name: str, target: str, data: list[dict], slots: asyncio.Semaphore):
+        """Insert one batch into one database, retrying, then free its slot."""
+        client = self.clients[db_name]
+        try:
+            for attempt in range(self.max_retries + 1):
+                start = time.perf_counter()
+                try:
+                    await client.insert_data(target, data)
+                except Exception as e:
+                    if self.dead_letters is not None and is_row_error(e):
+                        await self.isolate_rows(db_name, table_name, target, data, e)
+                        return
+                    if attempt == self.max_retries:
+                        self.failed_rows += len(data)
+                        self.metrics.record_error(db_name, table_name, len(data), e)
+                        print(f"Error inserting into {db_name} for table '{table_name}': {e}")
+                        return
+                    self.metrics.record_retry(db_name, table_name, attempt + 1, e)
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+                    continue
+                self.metrics.record_write(db_name, table_name, len(data), time.perf_counter() - start)
+                return
+        finally:
+            self.metrics.chunk_finished(db_name)
+            slots.release()
+
+    async def isolate_rows(self, db_name: str, table_name: str, target: str, data: list[dict], error: Exception):
+        """Bisect a batch that failed with a data error: write the good rows, dead-letter the bad ones."""
+        start = time.perf_counter()
+        try:
+            written, dead = await bisect_batch_async(partial(self.clients[db_name].insert_data, target), data, error)
+        except Exception as e:
+            self.failed_rows += len(data)
+            self.metrics.record_error(db_name, table_name, len(data), e)
+            print(f"Error inserting into {db_name} for table '{table_name}': {e}")
+            return
+        if written:
+            self.metrics.record_write(db_name, table_name, written, time.perf_counter() - start)
+        if dead:
+            path = await asyncio.to_thread(self.dead_letters.write, db_name, table_name, dead)
+            self.metrics.record_dead_letter(db_name, table_name, len(dead), dead[0][1], path)
+            print(f"{len(dead)} rows rejected by {db_name} for table '{table_name}' written to {path}")
+
+    async def load_file(self, file_path: str):
+        from data_pipeline import get_neo4j_label
+
+        table_name = os.path.splitext(os.path.basename(file_path))[0]
+        print(f"Processing file: {file_path} into table: '{table_name}' (async, {self.inflight} batches in flight)")
+        slots = {db_name: asyncio.Semaphore(self.inflight) for db_name in self.clients}
+        tasks = set()
+
+        def read_chunk(chunks):
+            start = time.perf_counter()
+            parsed = next(chunks, None)
+            if parsed is None:
+                return None
+            chunk, source_bytes = parsed
+            return chunk.to_dict(orient='records'), source_bytes, time.perf_counter() - start
+
+        with MmapCSVReader(file_path) as reader:
+            chunks = reader.chunks(self.chunk_size)
+            while True:
+                parsed = await asyncio.to_thread(read_chunk, chunks)
+                if parsed is None:
+                    break
+                data, source_bytes, elapsed = parsed
+                self.metrics.record_parse(table_name, len(data), source_bytes, elapsed)
+                for db_name in self.clients:
+                    await slots[db_name].acquire()
+                    self.metrics.chunk_submitted(db_name)
+                    target = get_neo4j_label(table_name) if db_name == "Neo4j" else table_name
+                    task = asyncio.create_task(self.write(db_name, table_name, target, data, slots[db_name]))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def run(self, csv_files: list[str], on_file_done=None):
+        await self.connect()
+        try:
+            for file_path in csv_files:
+                await self.load_file(file_path)
+                if on_file_done:
+                    on_file_done(file_path)
+        finally:
+            await self.close()
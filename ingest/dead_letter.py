@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Generator
+
+from db.database_client import PartialWriteError
+
+# Errors that say nothing about individual rows (connection loss, missing table, bad SQL,
+# a failed bulk-load tool such as bcp). Matched by class name anywhere in the exception's
+# MRO, so no driver has to be imported.
+BATCH_ERRORS = {
+    "OperationalError", "InterfaceError", "ProgrammingError", "InternalError", "NotSupportedError",
+    "ServiceUnavailable", "SessionExpired", "TransientError", "AutoReconnect", "ServerSelectionTimeoutError",
+    "NetworkTimeout", "ConnectionFailure", "ConnectionError", "TimeoutError", "CalledProcessError",
+}
+
+
+def is_row_error(error: Exception) -> bool:
+    """Whether a failed batch might succeed without some of its rows (a data or constraint error)."""
+    return not any(cls.__name__ in BATCH_ERRORS for cls in type(error).__mro__)
+
+
+def bisect_steps(rows: list[dict], error: Exception) -> Generator[list[dict], Exception, tuple]:
+    """Split a failed batch in halves until every bad row is alone.
+
+    Yields sub-batches to write and is sent back the exception (or None) for each.
+    Returns (rows written, [(row, error message)]). Raises a batch-level error as is.
+    With k bad rows out of n this takes about 2k·log2(n) writes.
+    """
+    written = 0
+    dead = []
+    pending = [(rows, error)]
+    while pending:
+        batch, error = pending.pop()
+        if error is None:
+            error = yield batch
+            if error is None:
+                written += len(batch)
+                continue
+        if isinstance(error, PartialWriteError):
+            dead.extend((batch[index], message) for index, message in sorted(error.failed.items()))
+            written += len(batch) - len(error.failed)
+        elif not is_row_error(error):
+            raise error
+        elif len(batch) == 1:
+            dead.append((batch[0], f"{type(error).__name__}: {error}"))
+        else:
+            middle = len(batch) // 2
+            pending.append((batch[middle:], None))
+            pending.append((batch[:middle], None))
+    return written, dead
+
+
+def bisect_batch(write: Callable[[list[dict]], None], rows: list[dict], error: Exception) -> tuple[int, list]:
+    """Write the good rows of a batch that failed with `error` and return (written, dead rows)."""
+    steps = bisect_steps(rows, error)
+    try:
+        batch = next(steps)
+        while True:
+            try:
+                write(batch)
+                result = None
+            except Exception as e:
+                result = e
+            batch = steps.send(result)
+    except StopIteration as done:
+        return done.value
+
+
+async def bisect_batch_async(write: Callable[[list[dict]], Awaitable[None]], rows: list[dict],
+                             error: Exception) -> tuple[int, list]:
+    """bisect_batch for asyncio clients."""
+    steps = bisect_steps(rows, error)
+    try:
+        batch = next(steps)
+        while True:
+            try:
+                await write(batch)
+                result = None
+            except Exception as e:
+                result = e
+            batch = steps.send(result)
+    except StopIteration as done:
+        return done.value
+
+
+def clean_value(value):
+    # JSON has no NaN; pandas uses it for empty cells.
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+class DeadLetterQueue:
+    """Rows a database rejected, appended as JSON lines to <directory>/<sink>/<table>.jsonl.
+
+    Each line is written with a single unbuffered append, so threads and worker
+    processes can share a file without interleaving records.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, sink: str, table: str) -> str:
+        return os.path.join(self.directory, sink, f"{table}.jsonl")
+
+    def write(self, sink: str, table: str, dead: list[tuple[dict, str]]) -> str:
+        path = self.path(sink, table)
+        ts = round(time.time(), 3)
+        lines = [json.dumps({"ts": ts, "sink": sink, "table": table, "error": error,
+                             "row": {key: clean_value(value) for key, value in row.items()}}, default=str)
+                 for row, error in dead]
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab", buffering=0) as f:
+                for line in lines:
+                    f.write(f"{line}\n".encode())
+        return path
+
+    def read(self, sink: str, table: str) -> list[dict]:
+        path = self.path(sink, table)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
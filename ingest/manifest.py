@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema.sql")
+
+# schema.sql keys books by goodreads_book_id while several CSVs call the same id book_id.
+COLUMN_ALIASES = {"goodreads_book_id": "book_id", "book_id": "goodreads_book_id"}
+
+
+def parse_primary_keys(schema_path: str = SCHEMA_PATH) -> dict[str, list[str]]:
+    """Read each table's primary key columns from a CREATE TABLE script."""
+    with open(schema_path) as f:
+        sql = f.read()
+    keys = {}
+    table_pattern = re.compile(r"CREATE\s+TABLE\s+([\w\.]+)\s*\((.*?)\);", re.DOTALL | re.IGNORECASE)
+    for match in table_pattern.finditer(sql):
+        table_name = match.group(1).split(".")[-1]
+        body = match.group(2)
+        table_level = re.search(r"PRIMARY\s+KEY\s*\(([^)]+)\)", body, re.IGNORECASE)
+        if table_level:
+            keys[table_name] = [c.strip() for c in table_level.group(1).split(",")]
+            continue
+        inline = re.search(r"^\s*(\w+)\s+[^,\n]*\bPRIMARY\s+KEY\b", body, re.IGNORECASE | re.MULTILINE)
+        if inline:
+            keys[table_name] = [inline.group(1)]
+    return keys
+
+
+def resolve_key_columns(table_name: str, columns: list[str], primary_keys: dict[str, list[str]]) -> list[str]:
+    """Map a table's primary key onto the columns present in its CSV.
+
+    Falls back to every column when the table has no known key, so that only
+    rows never seen before count as new.
+    """
+    resolved = []
+    for column in primary_keys.get(table_name, []):
+        if column in columns:
+            resolved.append(column)
+        elif COLUMN_ALIASES.get(column) in columns:
+            resolved.append(COLUMN_ALIASES[column])
+        else:
+            return list(columns)
+    return resolved or list(columns)
+
+
+def hash_rows(frame: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+class LoadManifest:
+    """Compact on-disk record of the rows already loaded, per table.
+
+    For every table the manifest keeps two uint64 arrays sorted by key hash:
+    the hash of each row's primary key and the hash of the whole row (16 bytes
+    per row). Lookups are vectorised binary searches, so comparing a chunk
+    against millions of loaded rows costs a few milliseconds.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._tables: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._pending: dict[str, list[tuple[np.ndarray, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, table_name: str) -> str:
+        return os.path.join(self.directory, f"{table_name}.npz")
+
+    def _load(self, table_name: str) -> tuple[np.ndarray, np.ndarray]:
+        if table_name not in self._tables:
+            path = self._path(table_name)
+            if os.path.exists(path):
+                with np.load(path) as stored:
+                    self._tables[table_name] = (stored["keys"], stored["rows"])
+            else:
+                empty = np.empty(0, dtype=np.uint64)
+                self._tables[table_name] = (empty, empty)
+        return self._tables[table_name]
+
+    def delta(self, table_name: str, chunk: pd.DataFrame, key_columns: list[str]):
+        """Return (new or changed rows, their key hashes, their row hashes)."""
+        key_hashes = hash_rows(chunk[key_columns])
+        row_hashes = hash_rows(chunk)
+        with self._lock:
+            keys, rows = self._load(table_name)
+        if len(keys):
+            positions = np.searchsorted(keys, key_hashes)
+            positions[positions == len(keys)] = 0
+            unchanged = (keys[positions] == key_hashes) & (rows[positions] == row_hashes)
+        else:
+            unchanged = np.zeros(len(chunk), dtype=bool)
+        changed = ~unchanged
+        return chunk[changed], key_hashes[changed], row_hashes[changed]
+
+    def mark_loaded(self, table_name: str, key_hashes: np.ndarray, row_hashes: np.ndarray):
+        """Remember rows that every sink accepted; written out by save()."""
+        if len(key_hashes):
+            with self._lock:
+                self._pending.setdefault(table_name, []).append((key_hashes, row_hashes))
+
+    def discard(self, table_name: str):
+        with self._lock:
+            self._pending.pop(table_name, None)
+
+    def save(self, table_name: str):
+        """Merge pending rows into the table's manifest and write it atomically."""
+        with self._lock:
+            pending = self._pending.pop(table_name, [])
+            if not pending:
+                return
+            keys, rows = self._load(table_name)
+            all_keys = np.concatenate([keys] + [k for k, _ in pending])
+            all_rows = np.concatenate([rows] + [r for _, r in pending])
+            # Keep the most recent row hash for each key.
+            order = np.argsort(all_keys[::-1], kind="stable")
+            reversed_keys = all_keys[::-1][order]
+            first = np.ones(len(reversed_keys), dtype=bool)
+            first[1:] = reversed_keys[1:] != reversed_keys[:-1]
+            merged_keys = reversed_keys[first]
+            merged_rows = all_rows[::-1][order][first]
+            tmp_path = self._path(table_name) + ".tmp.npz"
+            np.savez(tmp_path, keys=merged_keys, rows=merged_rows)
+            os.replace(tmp_path, self._path(table_name))
+            self._tables[table_name] = (merged_keys, merged_rows)
+
+    def loaded_count(self, table_name: str) -> Optional[int]:
+        with self._lock:
+            return len(self._load(table_name)[0])
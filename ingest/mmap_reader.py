@@ -0,0 +1,153 @@
+import io
+import mmap
+import os
+import threading
+from typing import Iterator, Optional
+
+import pandas as pd
+
+DEFAULT_RANGE_BYTES = 32 * 1024 * 1024
+
+
+def line_ranges(buf, start: int, end: int, range_bytes: int) -> list[tuple[int, int]]:
+    """Split buf[start:end] into ranges of about range_bytes that each end just after a newline."""
+    ranges = []
+    while start < end:
+        cut = buf.find(b"\n", min(start + range_bytes, end) - 1, end)
+        stop = end if cut == -1 else cut + 1
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class RangeReader(io.RawIOBase):
+    """Read-only file object over the header plus one byte range of a memory-mapped CSV.
+
+    pandas pulls small blocks through readinto(), straight from the page cache,
+    so parsing a range never copies it into the Python heap as a whole.
+    """
+
+    def __init__(self, buf, header: bytes, start: int, end: int):
+        super().__init__()
+        self.view = memoryview(buf)
+        self.header = header
+        self.start = start
+        self.end = end
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def readinto(self, b) -> int:
+        header_len = len(self.header)
+        if self.position < header_len:
+            data = self.header[self.position:self.position + len(b)]
+        else:
+            offset = self.start + self.position - header_len
+            data = self.view[offset:min(offset + len(b), self.end)]
+        n = len(data)
+        b[:n] = data
+        self.position += n
+        return n
+
+    def close(self):
+        self.view.release()
+        super().close()
+
+
+class MmapCSVReader:
+    """A CSV memory-mapped read-only, split into line-aligned ranges that parse independently.
+
+    Pages are loaded on demand and dropped by the kernel under pressure, so the
+    resident size of a reader stays flat however large the file is.
+    """
+
+    def __init__(self, path: str, range_bytes: int = DEFAULT_RANGE_BYTES):
+        self.path = path
+        self.range_bytes = range_bytes
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+        # mmap cannot map an empty file.
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        newline = self.buf.find(b"\n")
+        self.data_start = self.size if newline == -1 else newline + 1
+        self.header = bytes(self.buf[:self.data_start])
+        self._readers: list[RangeReader] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ranges(self) -> list[tuple[int, int]]:
+        return line_ranges(self.buf, self.data_start, self.size, self.range_bytes)
+
+    def open_range(self, start: Optional[int] = None, end: Optional[int] = None) -> RangeReader:
+        """A file object over one range (the whole body by default), with the header in front."""
+        reader = RangeReader(self.buf, self.header, self.data_start if start is None else start,
+                             self.size if end is None else end)
+        self._readers.append(reader)
+        return reader
+
+    def chunks(self, chunk_size: int, start: Optional[int] = None,
+               end: Optional[int] = None) -> Iterator[tuple[pd.DataFrame, int]]:
+        """Parse a range in DataFrames of chunk_size rows, each with the source bytes read for it."""
+        with self.open_range(start, end) as reader:
+            position = 0
+            for chunk in pd.read_csv(reader, chunksize=chunk_size):
+                # The parser reads ahead in blocks, so bytes are attributed per block read.
+                yield chunk, reader.tell() - position
+                position = reader.tell()
+
+    def close(self):
+        # A chunk generator abandoned mid-file still holds a view; the mmap cannot close under it.
+        for reader in self._readers:
+            reader.close()
+        self._readers = []
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self._file.close()
+
+
+def byte_ranges(path: str, range_bytes: int) -> tuple[bytes, list[tuple[int, int]]]:
+    """The header and line-aligned byte ranges of a CSV."""
+    with MmapCSVReader(path, range_bytes) as reader:
+        return reader.header, reader.ranges()
+
+
+class MemoryBudget:
+    """Ceiling on the bytes of parsed data in flight; acquire() blocks until enough is released.
+
+    Pass a multiprocessing context to share one budget between processes. A single
+    request larger than the whole limit is admitted once nothing else is in flight.
+    """
+
+    def __init__(self, limit: int, context=None):
+        self.limit = limit
+        self._cond = context.Condition() if context else threading.Condition()
+        self._used = context.RawValue("q", 0) if context else None
+        self._local_used = 0
+
+    @property
+    def in_use(self) -> int:
+        return self._used.value if self._used is not None else self._local_used
+
+    def _add(self, nbytes: int):
+        if self._used is not None:
+            self._used.value += nbytes
+        else:
+            self._local_used += nbytes
+
+    def acquire(self, nbytes: int):
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_use == 0 or self.in_use + nbytes <= self.limit)
+            self._add(nbytes)
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self._add(-nbytes)
+            self._cond.notify_all()
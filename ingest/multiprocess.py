@@ -0,0 +1,335 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from db.config import DatabaseSettings
+from ingest.dead_letter import DeadLetterQueue, bisect_batch, is_row_error
+from ingest.mmap_reader import DEFAULT_RANGE_BYTES, MemoryBudget, MmapCSVReader
+
+TEXT = "str"
+
+
+class ColumnLayout(BaseModel):
+    """Where one column of a batch lives in its shared memory segment.
+
+    Fixed-width columns are stored as a raw NumPy buffer. Text columns use an
+    Arrow-style layout: concatenated UTF-8 bytes, int64 offsets and a null mask.
+    """
+    name: str
+    dtype: str
+    offset: int
+    nbytes: int
+    offsets_offset: int = 0
+    mask_offset: int = 0
+
+
+class SharedBatch(BaseModel):
+    """Descriptor of a parsed chunk in shared memory; the only thing sent between processes."""
+    batch_id: str
+    table_name: str
+    shm_name: str
+    rows: int
+    columns: list[ColumnLayout]
+    nbytes: int = 0
+    source_bytes: int = 0
+    parse_seconds: float = 0.0
+
+
+def write_batch(chunk: pd.DataFrame, table_name: str, batch_id: str,
+                budget: Optional[MemoryBudget] = None) -> tuple[SharedBatch, shared_memory.SharedMemory]:
+    """Copy a DataFrame chunk into a new shared memory segment, first reserving its size from budget."""
+    parts = []
+    layouts = []
+    size = 0
+
+    def reserve(array: np.ndarray) -> int:
+        nonlocal size
+        offset = size
+        parts.append((offset, array))
+        size += (array.nbytes + 7) // 8 * 8
+        return offset
+
+    for name in chunk.columns:
+        series = chunk[name]
+        if series.dtype.kind in "biuf":
+            values = np.ascontiguousarray(series.to_numpy())
+            layouts.append(ColumnLayout(name=str(name), dtype=values.dtype.str, offset=reserve(values),
+                                        nbytes=values.nbytes))
+            continue
+        mask = series.isna().to_numpy(dtype=np.bool_)
+        encoded = [b"" if missing else str(value).encode() for value, missing in zip(series.tolist(), mask)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        layouts.append(ColumnLayout(name=str(name), dtype=TEXT, offset=reserve(data), nbytes=data.nbytes,
+                                    offsets_offset=reserve(offsets), mask_offset=reserve(mask)))
+
+    size = max(size, 1)
+    if budget is not None:
+        budget.acquire(size)
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+    except Exception:
+        if budget is not None:
+            budget.release(size)
+        raise
+    for offset, array in parts:
+        shm.buf[offset:offset + array.nbytes] = array.view(np.uint8).reshape(-1)
+    return SharedBatch(batch_id=batch_id, table_name=table_name, shm_name=shm.name, rows=len(chunk),
+                       columns=layouts, nbytes=size), shm
+
+
+def read_batch(batch: SharedBatch, shm: shared_memory.SharedMemory) -> list[dict]:
+    """Rebuild row dicts from a batch; every value is copied out, so shm can be closed afterwards."""
+    buf = shm.buf
+    columns = []
+    for layout in batch.columns:
+        if layout.dtype != TEXT:
+            columns.append(np.frombuffer(buf, dtype=layout.dtype, count=batch.rows, offset=layout.offset).tolist())
+            continue
+        offsets = np.frombuffer(buf, dtype=np.int64, count=batch.rows + 1, offset=layout.offsets_offset).tolist()
+        mask = np.frombuffer(buf, dtype=np.bool_, count=batch.rows, offset=layout.mask_offset).tolist()
+        raw = bytes(buf[layout.offset:layout.offset + layout.nbytes])
+        columns.append([None if missing else raw[start:end].decode()
+                        for start, end, missing in zip(offsets, offsets[1:], mask)])
+    names = [layout.name for layout in batch.columns]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def release(shm_name: str):
+    """Free a batch's shared memory once every sink has acknowledged it."""
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def parser_process(tasks, events, budget: MemoryBudget, chunk_size: int):
+    """Parse byte ranges of memory-mapped CSV files into shared memory batches."""
+    pid = os.getpid()
+    count = 0
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        file_path, table_name, start, end = task
+        try:
+            with MmapCSVReader(file_path) as reader:
+                chunks = reader.chunks(chunk_size, start, end)
+                while True:
+                    parse_start = time.perf_counter()
+                    try:
+                        chunk, source_bytes = next(chunks)
+                    except StopIteration:
+                        break
+                    parse_seconds = time.perf_counter() - parse_start
+                    count += 1
+                    # Blocks while the batches in flight fill the memory budget, so parsers
+                    # cannot outrun the sinks.
+                    batch, shm = write_batch(chunk, table_name, f"{pid}-{count}", budget)
+                    batch.source_bytes, batch.parse_seconds = source_bytes, parse_seconds
+                    shm.close()
+                    events.put(("batch", batch))
+        except Exception as e:
+            events.put(("parse_error", table_name, f"{type(e).__name__}: {e}"))
+        events.put(("range_done", table_name))
+    events.put(("parser_exit", pid))
+
+
+def sink_process(db_name: str, client_name: str, settings: DatabaseSettings, inbox, events, max_retries: int,
+                 retry_backoff: float, dead_letter_dir: Optional[str] = None):
+    """Write batches to one database; row dicts are built here, in parallel with the other sinks."""
+    from data_pipeline import get_neo4j_label
+    from db.connection_manager import ConnectionManager
+
+    dead_letters = DeadLetterQueue(dead_letter_dir) if dead_letter_dir else None
+    with ConnectionManager(settings) as connections:
+        client = connections.client(client_name)
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                break
+            shm = shared_memory.SharedMemory(name=batch.shm_name)
+            try:
+                rows = read_batch(batch, shm)
+            finally:
+                shm.close()
+            target = get_neo4j_label(batch.table_name) if db_name == "Neo4j" else batch.table_name
+            retries = []
+            error = None
+            dead = None
+            for attempt in range(max_retries + 1):
+                start = time.perf_counter()
+                try:
+                    client.insert_data(target, rows)
+                    error = None
+                    break
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if dead_letters is not None and is_row_error(e):
+                        # Isolate the bad rows instead of retrying a batch that will fail the same way.
+                        try:
+                            _, rejected = bisect_batch(partial(client.insert_data, target), rows, e)
+                        except Exception as batch_error:
+                            error = f"{type(batch_error).__name__}: {batch_error}"
+                            break
+                        error = None
+                        if rejected:
+                            path = dead_letters.write(db_name, batch.table_name, rejected)
+                            dead = (len(rejected), rejected[0][1], path)
+                        break
+                    if attempt < max_retries:
+                        retries.append(error)
+                        time.sleep(retry_backoff * 2 ** attempt)
+            events.put(("ack", batch.batch_id, db_name, batch.table_name, len(rows),
+                        time.perf_counter() - start, error, retries, dead))
+
+
+class MultiprocessLoader:
+    """Parser processes fill shared memory batches; sink processes write them; this class schedules.
+
+    Only small SharedBatch descriptors cross process boundaries. Parsing, row
+    building and driver work all run outside the main process, so throughput
+    scales with cores instead of being capped by one interpreter's GIL.
+    """
+
+    def __init__(self, sink_names: list[str], settings: DatabaseSettings, metrics, parsers: Optional[int] = None,
+                 sink_workers: int = 1, chunk_size: int = 1000, range_bytes: int = DEFAULT_RANGE_BYTES,
+                 memory_limit: int = 256 * 1024 * 1024, max_retries: int = 0, retry_backoff: float = 1.0,
+                 dead_letter_dir: Optional[str] = None, start_method: str = "spawn"):
+        from data_pipeline import SINK_CLIENTS
+
+        self.sink_clients = {db_name: SINK_CLIENTS[db_name] for db_name in sink_names}
+        self.settings = settings
+        self.metrics = metrics
+        self.parsers = parsers or os.cpu_count() or 1
+        self.sink_workers = sink_workers
+        self.chunk_size = chunk_size
+        self.range_bytes = range_bytes
+        # Ceiling on the shared memory held by batches that are parsed but not yet written everywhere.
+        self.memory_limit = memory_limit
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dead_letter_dir = dead_letter_dir
+        self.context = mp.get_context(start_method)
+        self.processes: list = []
+        self.pending: dict[str, list] = {}
+        self.failed_rows = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.stop(graceful=exc_type is None)
+
+    def start(self):
+        context = self.context
+        self.events = context.Queue()
+        self.tasks = context.Queue()
+        self.budget = MemoryBudget(self.memory_limit, context)
+        self.inboxes = {db_name: context.Queue() for db_name in self.sink_clients}
+        for db_name, client_name in self.sink_clients.items():
+            for i in range(self.sink_workers):
+                self.processes.append(context.Process(
+                    target=sink_process, name=f"sink-{client_name}-{i}", daemon=True,
+                    args=(db_name, client_name, self.settings, self.inboxes[db_name], self.events,
+                          self.max_retries, self.retry_backoff, self.dead_letter_dir)))
+        for i in range(self.parsers):
+            self.processes.append(context.Process(
+                target=parser_process, name=f"parser-{i}", daemon=True,
+                args=(self.tasks, self.events, self.budget, self.chunk_size)))
+        for process in self.processes:
+            process.start()
+
+    def load_file(self, file_path: str):
+        """Parse one CSV in parallel byte ranges and wait until every sink has written it."""
+        table_name = os.path.splitext(os.path.basename(file_path))[0]
+        print(f"Processing file: {file_path} into table: '{table_name}' with {self.parsers} parser processes")
+        with MmapCSVReader(file_path, self.range_bytes) as reader:
+            ranges = reader.ranges()
+        for start, end in ranges:
+            self.tasks.put((file_path, table_name, start, end))
+        remaining = len(ranges)
+        while remaining or self.pending:
+            event = self.next_event()
+            if event[0] == "range_done":
+                remaining -= 1
+            else:
+                self.handle(event)
+
+    def next_event(self):
+        while True:
+            try:
+                return self.events.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.name for p in self.processes if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"Loader processes exited unexpectedly: {', '.join(dead)}")
+
+    def handle(self, event):
+        kind = event[0]
+        if kind == "batch":
+            batch = event[1]
+            self.metrics.record_parse(batch.table_name, batch.rows, batch.source_bytes, batch.parse_seconds)
+            self.pending[batch.batch_id] = [batch, len(self.inboxes)]
+            for db_name, inbox in self.inboxes.items():
+                self.metrics.chunk_submitted(db_name)
+                inbox.put(batch)
+        elif kind == "ack":
+            _, batch_id, db_name, table_name, rows, elapsed, error, retries, dead = event
+            self.metrics.chunk_finished(db_name)
+            for attempt, retry_error in enumerate(retries, start=1):
+                self.metrics.record_retry(db_name, table_name, attempt, RuntimeError(retry_error))
+            if error:
+                self.failed_rows += rows
+                self.metrics.record_error(db_name, table_name, rows, RuntimeError(error))
+                print(f"Error inserting into {db_name} for table '{table_name}': {error}")
+            elif dead:
+                dead_rows, dead_error, path = dead
+                self.metrics.record_write(db_name, table_name, rows - dead_rows, elapsed)
+                self.metrics.record_dead_letter(db_name, table_name, dead_rows, dead_error, path)
+                print(f"{dead_rows} rows rejected by {db_name} for table '{table_name}' written to {path}")
+            else:
+                self.metrics.record_write(db_name, table_name, rows, elapsed)
+            entry = self.pending[batch_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.pending[batch_id]
+                release(entry[0].shm_name)
+                self.budget.release(entry[0].nbytes)
+        elif kind == "parse_error":
+            print(f"Error parsing '{event[1]}': {event[2]}")
+
+    def stop(self, graceful: bool = True):
+        if graceful:
+            for _ in range(self.parsers):
+                self.tasks.put(None)
+            for inbox in self.inboxes.values():
+                for _ in range(self.sink_workers):
+                    inbox.put(None)
+            # Keep draining events: a child cannot exit while its queued messages are unread.
+            while any(process.is_alive() for process in self.processes):
+                try:
+                    self.events.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        else:
+            for process in self.processes:
+                process.terminate()
+        for process in self.processes:
+            process.join()
+        for batch, _ in self.pending.values():
+            release(batch.shm_name)
+        self.pending.clear()
+        self.processes = []
@@ -0,0 +1,5 @@
+from .registry import Counter, Gauge, Histogram, MetricsRegistry, REGISTRY, DEFAULT_BUCKETS
+from .exposition import render_prometheus, CONTENT_TYPE
+
+__all__ = ["Counter", "Gauge", "Histogram", "MetricsRegistry", "REGISTRY", "DEFAULT_BUCKETS",
+           "render_prometheus", "CONTENT_TYPE"]
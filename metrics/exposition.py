@@ -0,0 +1,39 @@
+import math
+
+from .registry import REGISTRY, Histogram, MetricsRegistry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus(registry: MetricsRegistry = REGISTRY) -> str:
+    """Render every metric in the registry in the Prometheus text exposition format."""
+    lines = []
+    for metric in sorted(registry.metrics(), key=lambda m: m.name):
+        lines.append(f"# HELP {metric.name} {_escape(metric.description)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for key, sample in sorted(metric.samples().items()):
+            base = list(zip(metric.label_names, key))
+            if isinstance(metric, Histogram):
+                for bound, count in sample["buckets"].items():
+                    lines.append(f"{metric.name}_bucket{_labels(base + [('le', _number(bound))])} {count}")
+                lines.append(f"{metric.name}_sum{_labels(base)} {_number(sample['sum'])}")
+                lines.append(f"{metric.name}_count{_labels(base)} {sample['count']}")
+            else:
+                lines.append(f"{metric.name}{_labels(base)} {_number(sample)}")
+    return "\n".join(lines) + "\n"
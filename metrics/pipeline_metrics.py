@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .exposition import CONTENT_TYPE, render_prometheus
+from .registry import REGISTRY, MetricsRegistry
+
+# Chunk latencies range from milliseconds (ClickHouse) to minutes (per-record Neo4j).
+CHUNK_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+logger = logging.getLogger("pipeline")
+
+
+class PipelineMetrics:
+    """Throughput, latency and error accounting for DataPipeline and its sinks.
+
+    Every event updates the Prometheus registry and is also written as a
+    one-line JSON log record on the "pipeline" logger.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+        self.started_at = time.time()
+        self.rows_written = registry.counter(
+            "pipeline_rows_written_total", "Rows written per sink and table", ("sink", "table"))
+        self.chunk_latency = registry.histogram(
+            "pipeline_chunk_latency_seconds", "Time to write one chunk to a sink", ("sink", "table"),
+            buckets=CHUNK_BUCKETS)
+        self.errors = registry.counter(
+            "pipeline_errors_total", "Failed chunk writes per sink and table", ("sink", "table"))
+        self.retries = registry.counter(
+            "pipeline_retries_total", "Chunk write retries per sink and table", ("sink", "table"))
+        self.queue_depth = registry.gauge(
+            "pipeline_queue_depth", "Chunks submitted to a sink and not yet written", ("sink",))
+        self.rows_read = registry.counter(
+            "pipeline_rows_read_total", "Rows parsed from CSV per table", ("table",))
+        self.bytes_read = registry.counter(
+            "pipeline_bytes_read_total", "CSV bytes read per table", ("table",))
+        self.parse_latency = registry.histogram(
+            "pipeline_csv_parse_seconds", "Time to parse one CSV chunk", ("table",), buckets=CHUNK_BUCKETS)
+        self.batch_size = registry.gauge(
+            "pipeline_batch_size", "Current batch size per sink and table", ("sink", "table"))
+        self.rows_unchanged = registry.counter(
+            "pipeline_rows_unchanged_total", "Rows skipped by incremental loads as already loaded", ("table",))
+        self.rows_dead_lettered = registry.counter(
+            "pipeline_rows_dead_lettered_total", "Rows a sink rejected, written to the dead-letter queue",
+            ("sink", "table"))
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @staticmethod
+    def log_event(event: str, **fields):
+        logger.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str))
+
+    # ----- Recording -----
+    def record_parse(self, table: str, rows: int, num_bytes: int, elapsed: float):
+        self.rows_read.inc(rows, table=table)
+        self.bytes_read.inc(num_bytes, table=table)
+        self.parse_latency.observe(elapsed, table=table)
+        self.log_event("chunk_parsed", table=table, rows=rows, bytes=num_bytes, seconds=round(elapsed, 6))
+
+    def record_delta(self, table: str, rows: int, changed: int):
+        self.rows_unchanged.inc(rows - changed, table=table)
+        self.log_event("chunk_delta", table=table, rows=rows, changed=changed)
+
+    def chunk_submitted(self, sink: str):
+        self.queue_depth.inc(sink=sink)
+
+    def chunk_finished(self, sink: str):
+        self.queue_depth.dec(sink=sink)
+
+    def record_write(self, sink: str, table: str, rows: int, elapsed: float):
+        self.rows_written.inc(rows, sink=sink, table=table)
+        self.chunk_latency.observe(elapsed, sink=sink, table=table)
+        self.log_event("chunk_written", sink=sink, table=table, rows=rows, seconds=round(elapsed, 6),
+                       rows_per_sec=round(rows / elapsed, 1) if elapsed > 0 else None)
+
+    def record_batch_size(self, sink: str, table: str, size: int):
+        if self.batch_size.value(sink=sink, table=table) != size:
+            self.batch_size.set(size, sink=sink, table=table)
+            self.log_event("batch_size", sink=sink, table=table, size=size)
+
+    def record_error(self, sink: str, table: str, rows: int, error: Exception):
+        self.errors.inc(sink=sink, table=table)
+        self.log_event("chunk_failed", sink=sink, table=table, rows=rows, error=str(error))
+
+    def record_retry(self, sink: str, table: str, attempt: int, error: Exception):
+        self.retries.inc(sink=sink, table=table)
+        self.log_event("chunk_retry", sink=sink, table=table, attempt=attempt, error=str(error))
+
+    def record_dead_letter(self, sink: str, table: str, rows: int, error: str, path: str):
+        self.rows_dead_lettered.inc(rows, sink=sink, table=table)
+        self.log_event("rows_dead_lettered", sink=sink, table=table, rows=rows, error=error, path=path)
+
+    # ----- Reporting -----
+    def summary(self) -> dict:
+        """Per-sink and per-table totals for the run so far."""
+        wall_seconds = time.time() - self.started_at
+        latency = self.chunk_latency.samples()
+        sinks: dict[str, dict] = {}
+        for (sink, table), rows in self.rows_written.samples().items():
+            entry = sinks.setdefault(sink, {"rows": 0, "busy_seconds": 0.0, "chunks": 0, "errors": 0, "retries": 0,
+                                            "dead_letters": 0})
+            entry["rows"] += int(rows)
+            sample = latency.get((sink, table))
+            if sample:
+                entry["busy_seconds"] += sample["sum"]
+                entry["chunks"] += sample["count"]
+        for metric, field in ((self.errors, "errors"), (self.retries, "retries"),
+                              (self.rows_dead_lettered, "dead_letters")):
+            for (sink, _), count in metric.samples().items():
+                sinks.setdefault(sink, {"rows": 0, "busy_seconds": 0.0, "chunks": 0, "errors": 0, "retries": 0,
+                                        "dead_letters": 0})
+                sinks[sink][field] += int(count)
+        for entry in sinks.values():
+            busy = entry["busy_seconds"]
+            entry["rows_per_sec"] = round(entry["rows"] / busy, 1) if busy else None
+        for row in self.chunk_latency.snapshot():
+            entry = sinks[row["sink"]]
+            entry["p95_chunk_seconds"] = max(entry.get("p95_chunk_seconds") or 0.0, row["p95"] or 0.0)
+
+        tables = {}
+        parse = self.parse_latency.samples()
+        for (table,), rows in self.rows_read.samples().items():
+            tables[table] = {
+                "rows": int(rows),
+                "bytes": int(self.bytes_read.value(table=table)),
+                "parse_seconds": round(parse[(table,)]["sum"], 3) if (table,) in parse else 0.0,
+                "unchanged": int(self.rows_unchanged.value(table=table)),
+            }
+        return {"wall_seconds": round(wall_seconds, 3), "sinks": sinks, "tables": tables}
+
+    def print_summary(self):
+        summary = self.summary()
+        self.log_event("run_summary", **summary)
+        print(f"Run summary ({summary['wall_seconds']:.1f}s):")
+        for sink, entry in sorted(summary["sinks"].items()):
+            rate = f"{entry['rows_per_sec']:.0f} rows/s" if entry["rows_per_sec"] else "n/a"
+            print(f"  {sink:<12} {entry['rows']:>10} rows  {rate:>14}  "
+                  f"p95 chunk {entry.get('p95_chunk_seconds') or 0:.3f}s  "
+                  f"errors {entry['errors']}  retries {entry['retries']}  dead letters {entry['dead_letters']}")
+        for table, entry in sorted(summary["tables"].items()):
+            print(f"  {table:<12} {entry['rows']:>10} rows read  {entry['bytes'] / 1e6:.1f} MB  "
+                  f"parse {entry['parse_seconds']:.2f}s  unchanged {entry['unchanged']}")
+
+    def write_textfile(self, path: str):
+        """Write the metrics for node_exporter's textfile collector (atomically)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(render_prometheus(self.registry))
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "0.0.0.0"):
+        """Expose /metrics over HTTP from a background thread."""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = render_prometheus(registry).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"Serving pipeline metrics on http://{host}:{port}/metrics")
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
@@ -0,0 +1,186 @@
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .registry import REGISTRY, MetricsRegistry
+
+# Phase timings and SQL durations collected for the request being served.
+_current_request: ContextVar[Optional["RequestProfile"]] = ContextVar("current_request", default=None)
+
+
+class RequestProfile:
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope or {}
+        self.phases: dict[str, float] = {}
+        self.statements: list[tuple[str, float]] = []
+        self.slow_statements: list[tuple[str, dict, float]] = []
+
+    @property
+    def endpoint(self) -> str:
+        # The router stores the matched route in the scope before calling the endpoint.
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+    def add_phase(self, name: str, elapsed: float):
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def phase(name: str):
+    """Time a phase of the current request (no-op outside a profiled request)."""
+    profile = _current_request.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_phase(name, time.perf_counter() - start)
+
+
+class QueryProfiler:
+    """Times every SQL statement and captures EXPLAIN ANALYZE for a sample of slow ones.
+
+    Statement timings are attached to the request in progress and flushed into
+    the registry, labelled by endpoint, when the request finishes. EXPLAIN runs
+    on a background thread with its own connection so the request is not held up.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, slow_threshold: float = 0.1,
+                 explain_sample_rate: float = 0.1, max_plans: int = 50):
+        self.slow_threshold = slow_threshold
+        self.explain_sample_rate = explain_sample_rate
+        self.plans = deque(maxlen=max_plans)
+        self._explain_queue: queue.Queue = queue.Queue(maxsize=100)
+        self._worker: Optional[threading.Thread] = None
+        self._installed = False
+        self.request_latency = registry.histogram(
+            "api_request_duration_seconds", "API request latency", ("endpoint", "method", "status"))
+        self.phase_latency = registry.histogram(
+            "api_request_phase_seconds", "Time spent per request phase", ("endpoint", "phase"))
+        self.sql_latency = registry.histogram(
+            "sql_statement_duration_seconds", "SQL statement execution time", ("endpoint", "verb"))
+        self.slow_statements = registry.counter(
+            "sql_slow_statements_total", "SQL statements slower than the slow-query threshold", ("endpoint",))
+
+    # ----- SQLAlchemy hooks -----
+    def install(self):
+        """Listen to cursor execution on every SQLAlchemy engine in the process."""
+        if self._installed:
+            return
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        self._installed = True
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        profile = _current_request.get()
+        if profile is None:
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        profile.add_phase("sql", elapsed)
+        profile.statements.append((verb, elapsed))
+        if elapsed >= self.slow_threshold:
+            profile.slow_statements.append((statement, parameters, elapsed))
+            if (not executemany and verb == "SELECT" and conn.dialect.name == "postgresql"
+                    and random.random() < self.explain_sample_rate):
+                self._queue_explain(conn.engine, statement, parameters, elapsed, profile.endpoint)
+
+    # ----- EXPLAIN sampling -----
+    def _queue_explain(self, engine, statement, parameters, elapsed, endpoint):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._explain_loop, name="explain-sampler", daemon=True)
+            self._worker.start()
+        try:
+            self._explain_queue.put_nowait((engine, statement, parameters, elapsed, endpoint))
+        except queue.Full:
+            pass
+
+    def _explain_loop(self):
+        while True:
+            engine, statement, parameters, elapsed, endpoint = self._explain_queue.get()
+            try:
+                raw = engine.raw_connection()
+                try:
+                    cursor = raw.cursor()
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                    plan = "\n".join(row[0] for row in cursor.fetchall())
+                    raw.rollback()
+                finally:
+                    raw.close()
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e}"
+            self.plans.append({
+                "endpoint": endpoint,
+                "duration_seconds": elapsed,
+                "statement": statement,
+                "plan": plan,
+                "captured_at": time.time(),
+            })
+
+    # ----- Request lifecycle -----
+    @contextmanager
+    def profile_request(self, scope: Optional[dict] = None):
+        profile = RequestProfile(scope)
+        token = _current_request.set(profile)
+        try:
+            yield profile
+        finally:
+            _current_request.reset(token)
+
+    def record_request(self, profile: RequestProfile, endpoint: str, method: str, status: int, elapsed: float):
+        self.request_latency.observe(elapsed, endpoint=endpoint, method=method, status=status)
+        for name, seconds in profile.phases.items():
+            self.phase_latency.observe(seconds, endpoint=endpoint, phase=name)
+        for verb, seconds in profile.statements:
+            self.sql_latency.observe(seconds, endpoint=endpoint, verb=verb)
+        if profile.slow_statements:
+            self.slow_statements.inc(len(profile.slow_statements), endpoint=endpoint)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware recording request latency, phase timings and SQL time per endpoint.
+
+    Endpoints are labelled by their route template (e.g. /api/dw/top10_books or
+    /api/relational/ratings_by_user/{user_id}), so metrics stay low-cardinality.
+    A Server-Timing header with the phase breakdown is added to each response.
+    """
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                timings = ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in profile.phases.items())
+                if timings:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", timings.encode())]
+            await send(message)
+
+        with self.profiler.profile_request(scope) as profile:
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self.profiler.record_request(profile, profile.endpoint, scope.get("method", ""), status["code"],
+                                             time.perf_counter() - start)
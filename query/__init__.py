@@ -0,0 +1,6 @@
+from .base import QueryBackend
+from .router import QueryRouter, QueryRoutingError, QUERY_SHAPES, DEFAULT_PREFERENCES
+from .singleflight import SingleFlight
+
+__all__ = ["QueryBackend", "QueryRouter", "QueryRoutingError", "QUERY_SHAPES", "DEFAULT_PREFERENCES",
+           "SingleFlight"]
@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+from typing import ClassVar
+from pydantic import BaseModel
+
+
+class QueryBackend(BaseModel, ABC):
+    """One store's implementation of the logical queries served by the API.
+
+    Every backend returns plain dicts with the same keys so that callers can
+    switch stores without reshaping the results:
+      - ratings_by_user: user_id, book_id, rating
+      - users_who_rated: user_id (and user_name when the store has users)
+      - top_n: book_id, title, avg_rating
+    """
+    name: ClassVar[str] = ""
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @abstractmethod
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        """Return every rating given by a user."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        """Return the users who rated a book."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def top_n(self, n: int = 5) -> list[dict]:
+        """Return the n highest-rated books by average rating."""
+        raise NotImplementedError
@@ -0,0 +1,46 @@
+from typing import ClassVar
+
+from db.clickhouse_client import ClickhouseClient
+from .base import QueryBackend
+
+
+class ClickhouseQueryBackend(QueryBackend):
+    """Queries over the tables in clickhouse_schema.sql (keyed by goodreads_book_id).
+
+    ClickHouse has no users table, so users_who_rated only returns user ids.
+    The tables are ReplacingMergeTree, so reads use FINAL to hide rows not yet merged away.
+    """
+    name: ClassVar[str] = "clickhouse"
+    client: ClickhouseClient
+
+    def _fetch(self, query: str, params: dict) -> list[dict]:
+        rows, columns = self.client.execute(query, params, with_column_types=True)
+        names = [name for name, _ in columns]
+        return [dict(zip(names, row)) for row in rows]
+
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        query = """
+        SELECT user_id, goodreads_book_id AS book_id, rating
+        FROM ratings FINAL
+        WHERE user_id = %(user_id)s
+        """
+        return self._fetch(query, {'user_id': user_id})
+
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        query = """
+        SELECT DISTINCT user_id
+        FROM ratings FINAL
+        WHERE goodreads_book_id = %(book_id)s
+        """
+        return self._fetch(query, {'book_id': book_id})
+
+    def top_n(self, n: int = 5) -> list[dict]:
+        query = """
+        SELECT r.goodreads_book_id AS book_id, any(b.title) AS title, avg(r.rating) AS avg_rating
+        FROM ratings AS r FINAL
+        LEFT JOIN books AS b FINAL ON b.goodreads_book_id = r.goodreads_book_id
+        GROUP BY book_id
+        ORDER BY avg_rating DESC
+        LIMIT %(n)s
+        """
+        return self._fetch(query, {'n': n})
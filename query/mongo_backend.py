@@ -0,0 +1,39 @@
+from typing import ClassVar
+
+from db.mongo_db_client import MongoDBClient
+from .base import QueryBackend
+
+
+class MongoQueryBackend(QueryBackend):
+    """Queries over the denormalised `users` collection with embedded ratings."""
+    name: ClassVar[str] = "mongo"
+    client: MongoDBClient
+    collection_name: str = "users"
+
+    def _collection(self):
+        if not self.client.client:
+            self.client.connect()
+        return self.client.db[self.collection_name]
+
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        document = self._collection().find_one({'user_id': user_id}, {'ratings': 1, '_id': 0})
+        if not document:
+            return []
+        return [{'user_id': user_id, 'book_id': r.get('book_id'), 'rating': r.get('rating')}
+                for r in document.get('ratings', [])]
+
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        cursor = self._collection().find({'ratings.book_id': book_id}, {'user_id': 1, 'user_name': 1, '_id': 0})
+        return list(cursor)
+
+    def top_n(self, n: int = 5) -> list[dict]:
+        pipeline = [
+            {'$unwind': '$ratings'},
+            {'$group': {'_id': '$ratings.book_id',
+                        'title': {'$first': '$ratings.title'},
+                        'avg_rating': {'$avg': '$ratings.rating'}}},
+            {'$sort': {'avg_rating': -1}},
+            {'$limit': n},
+            {'$project': {'_id': 0, 'book_id': '$_id', 'title': 1, 'avg_rating': 1}},
+        ]
+        return list(self._collection().aggregate(pipeline))
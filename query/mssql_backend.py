@@ -0,0 +1,35 @@
+from typing import ClassVar
+from sqlalchemy import text
+
+from db.mssql_client import MSSQLClient
+from .base import QueryBackend
+
+
+class MSSQLQueryBackend(QueryBackend):
+    """Queries over the tables in init_mssql.sql (no users table)."""
+    name: ClassVar[str] = "mssql"
+    client: MSSQLClient
+
+    def _fetch(self, query: str, **params) -> list[dict]:
+        if not self.client.engine:
+            self.client.connect()
+        with self.client.engine.connect() as conn:
+            result = conn.execute(text(query), params).fetchall()
+        return [dict(row._mapping) for row in result]
+
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        return self._fetch("SELECT user_id, book_id, rating FROM dbo.ratings WHERE user_id = :user_id",
+                           user_id=user_id)
+
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        return self._fetch("SELECT user_id FROM dbo.ratings WHERE book_id = :book_id", book_id=book_id)
+
+    def top_n(self, n: int = 5) -> list[dict]:
+        query = """
+        SELECT TOP (:n) b.book_id, b.title, AVG(r.rating) AS avg_rating
+        FROM dbo.books AS b
+        JOIN dbo.ratings AS r ON r.book_id = b.book_id
+        GROUP BY b.book_id, b.title
+        ORDER BY avg_rating DESC
+        """
+        return self._fetch(query, n=n)
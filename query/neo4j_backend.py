@@ -0,0 +1,40 @@
+from typing import ClassVar
+
+from db.neo4j_client import Neo4jClient
+from .base import QueryBackend
+
+
+class Neo4jQueryBackend(QueryBackend):
+    """Cypher queries over (:User)-[:RATED]->(:Book)."""
+    name: ClassVar[str] = "neo4j"
+    client: Neo4jClient
+
+    def _run(self, query: str, **params) -> list[dict]:
+        if not self.client.driver:
+            self.client.connect()
+        with self.client.driver.session() as session:
+            return [record.data() for record in session.run(query, **params)]
+
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        query = """
+        MATCH (u:User {user_id: $user_id})-[r:RATED]->(b:Book)
+        RETURN u.user_id AS user_id, b.book_id AS book_id, r.rating AS rating
+        """
+        return self._run(query, user_id=user_id)
+
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        query = """
+        MATCH (u:User)-[r:RATED]->(b:Book {book_id: $book_id})
+        RETURN u.user_id AS user_id, u.user_name AS user_name
+        """
+        return self._run(query, book_id=book_id)
+
+    def top_n(self, n: int = 5) -> list[dict]:
+        query = """
+        MATCH (:User)-[r:RATED]->(b:Book)
+        WITH b, avg(r.rating) AS avg_rating
+        RETURN b.book_id AS book_id, b.title AS title, avg_rating
+        ORDER BY avg_rating DESC
+        LIMIT $n
+        """
+        return self._run(query, n=n)
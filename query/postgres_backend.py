@@ -0,0 +1,53 @@
+from typing import ClassVar, Optional
+from sqlalchemy import MetaData, Table, select, func
+
+from db.postgre_sql_client import PostgreSQLClient
+from .base import QueryBackend
+
+
+class PostgresQueryBackend(QueryBackend):
+    """Relational queries against the users/books/ratings schema used by the API."""
+    name: ClassVar[str] = "postgres"
+    client: PostgreSQLClient
+    tables: Optional[dict] = None
+
+    def _tables(self) -> dict:
+        # Reflect once and reuse; reflection costs several catalog round trips.
+        if self.tables is None:
+            if not self.client.engine:
+                self.client.connect()
+            metadata = MetaData()
+            self.tables = {name: Table(name, metadata, autoload_with=self.client.engine)
+                           for name in ("users", "books", "ratings")}
+        return self.tables
+
+    def _fetch(self, query) -> list[dict]:
+        with self.client.engine.connect() as conn:
+            result = conn.execute(query).fetchall()
+        return [dict(row._mapping) for row in result]
+
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        ratings = self._tables()["ratings"]
+        return self._fetch(select(ratings).where(ratings.c.user_id == user_id))
+
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        tables = self._tables()
+        ratings, users = tables["ratings"], tables["users"]
+        query = select(users.c.user_id, users.c.user_name)\
+            .select_from(ratings.join(users, ratings.c.user_id == users.c.user_id))\
+            .where(ratings.c.book_id == book_id)
+        return self._fetch(query)
+
+    def top_n(self, n: int = 5) -> list[dict]:
+        tables = self._tables()
+        ratings, books = tables["ratings"], tables["books"]
+        query = select(
+                    books.c.book_id,
+                    books.c.title,
+                    func.avg(ratings.c.rating).label("avg_rating")
+                )\
+                .select_from(books.join(ratings, books.c.book_id == ratings.c.book_id))\
+                .group_by(books.c.book_id)\
+                .order_by(func.avg(ratings.c.rating).desc())\
+                .limit(n)
+        return self._fetch(query)
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import Callable, Optional, Union
+
+from metrics import REGISTRY, MetricsRegistry
+from .base import QueryBackend
+
+# Each logical query is either a point lookup or an analytic aggregate.
+QUERY_SHAPES = {
+    "ratings_by_user": "point",
+    "users_who_rated": "point",
+    "top_n": "analytic",
+}
+
+# Candidate backends per shape, in order of preference before any latency is measured.
+DEFAULT_PREFERENCES = {
+    "point": ["postgres", "mongo"],
+    "analytic": ["clickhouse", "postgres"],
+}
+
+BackendFactory = Callable[[], QueryBackend]
+
+
+class QueryRoutingError(Exception):
+    """Raised when no backend could serve a query."""
+
+
+class QueryRouter:
+    """Dispatches logical queries to a backend and records per-backend latency.
+
+    A caller may pin a backend explicitly. Otherwise the router chooses among
+    the candidates for the query's shape: every candidate is first sampled
+    `min_samples` times, after which the one with the lowest smoothed latency
+    wins. If the chosen backend fails, the next candidate is tried; the failure
+    counts as a sample of `failure_penalty` seconds and the backend goes to the
+    back of the order for `cooldown` seconds, so a broken store is not retried
+    first on every request.
+    """
+
+    def __init__(self, backends: dict[str, Union[QueryBackend, BackendFactory]],
+                 preferences: Optional[dict[str, list[str]]] = None,
+                 registry: MetricsRegistry = REGISTRY,
+                 min_samples: int = 5, smoothing: float = 0.2,
+                 failure_penalty: float = 5.0, cooldown: float = 30.0):
+        self._backends = dict(backends)
+        self.preferences = preferences or DEFAULT_PREFERENCES
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self.failure_penalty = failure_penalty
+        self.cooldown = cooldown
+        self._failed_at: dict[tuple[str, str], float] = {}
+        self._ewma: dict[tuple[str, str], float] = {}
+        self._samples: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.latency = registry.histogram(
+            "query_backend_latency_seconds", "Latency of logical queries per backend",
+            ("backend", "query"))
+        self.errors = registry.counter(
+            "query_backend_errors_total", "Failed logical queries per backend", ("backend", "query"))
+
+    @property
+    def backend_names(self) -> list[str]:
+        return list(self._backends)
+
+    def backend(self, name: str) -> QueryBackend:
+        """Return the backend called `name`, building it on first use.
+
+        The factory runs outside the lock, so a slow connect does not hold up routing
+        for other backends; if two threads build at once, the first one stored wins.
+        """
+        if name not in self._backends:
+            raise KeyError(f"Unknown backend '{name}'. Available: {', '.join(self._backends)}")
+        with self._lock:
+            backend = self._backends[name]
+        if isinstance(backend, QueryBackend):
+            return backend
+        built = backend()
+        with self._lock:
+            if not isinstance(self._backends[name], QueryBackend):
+                self._backends[name] = built
+            return self._backends[name]
+
+    def candidates(self, query: str) -> list[str]:
+        shape = QUERY_SHAPES[query]
+        return [name for name in self.preferences.get(shape, []) if name in self._backends]
+
+    def choose(self, query: str) -> list[str]:
+        """Order the candidates for a query: unsampled ones first, then by smoothed latency.
+
+        Backends that failed within the last `cooldown` seconds come after all others.
+        """
+        candidates = self.candidates(query)
+        if not candidates:
+            raise QueryRoutingError(f"No backend configured for query '{query}'")
+        now = time.monotonic()
+        with self._lock:
+            cooling = {name for name in candidates
+                       if now - self._failed_at.get((name, query), float("-inf")) < self.cooldown}
+            healthy = [name for name in candidates if name not in cooling]
+            cooling = [name for name in candidates if name in cooling]
+            for name in healthy:
+                if self._samples.get((name, query), 0) < self.min_samples:
+                    return [name] + [other for other in healthy if other != name] + cooling
+            return sorted(healthy, key=lambda name: self._ewma[(name, query)]) + cooling
+
+    def _record(self, name: str, query: str, elapsed: float, observe: bool = True):
+        if observe:
+            self.latency.observe(elapsed, backend=name, query=query)
+        key = (name, query)
+        with self._lock:
+            previous = self._ewma.get(key)
+            self._ewma[key] = elapsed if previous is None else \
+                self.smoothing * elapsed + (1 - self.smoothing) * previous
+            self._samples[key] = self._samples.get(key, 0) + 1
+
+    def _record_failure(self, name: str, query: str):
+        self.errors.inc(backend=name, query=query)
+        self._record(name, query, self.failure_penalty, observe=False)
+        with self._lock:
+            self._failed_at[(name, query)] = time.monotonic()
+
+    def execute(self, query: str, *args, backend: Optional[str] = None) -> tuple[str, list[dict]]:
+        """Run a logical query and return (backend name, rows)."""
+        if query not in QUERY_SHAPES:
+            raise KeyError(f"Unknown query '{query}'")
+        order = [backend] if backend else self.choose(query)
+        last_error = None
+        for name in order:
+            start = time.perf_counter()
+            try:
+                # A backend that cannot be built (driver missing, server down) fails like a query.
+                rows = getattr(self.backend(name), query)(*args)
+            except Exception as e:
+                self._record_failure(name, query)
+                print(f"Query '{query}' failed on {name}: {e}")
+                last_error = e
+                continue
+            self._record(name, query, time.perf_counter() - start)
+            return name, rows
+        raise QueryRoutingError(f"Query '{query}' failed on {', '.join(order)}: {last_error}")
+
+    def latency_summary(self) -> list[dict]:
+        """Per-backend, per-query latency percentiles and smoothed latency."""
+        summary = self.latency.snapshot()
+        for entry in summary:
+            entry["ewma"] = self._ewma.get((entry["backend"], entry["query"]))
+        return summary
@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from metrics import REGISTRY, MetricsRegistry
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls: one runs, the others wait and share its result.
+
+    Nothing is cached. A call arriving after the running one has finished starts
+    a new execution, so results are never older than the request. If the
+    running call fails, every caller waiting on it gets the same exception.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = registry.counter(
+            "api_singleflight_executions_total", "Queries executed through single-flight", ("query",))
+        self.coalesced = registry.counter(
+            "api_singleflight_coalesced_total", "Requests served by another request's execution", ("query",))
+
+    def do(self, name: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """fn() for (name, key), shared with concurrent callers of the same name and key."""
+        full_key = (name, key)
+        with self._lock:
+            call = self._calls.get(full_key)
+            leader = call is None
+            if leader:
+                call = self._calls[full_key] = _Call()
+        if not leader:
+            self.coalesced.inc(query=name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.executions.inc(query=name)
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[full_key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -33,6 +33,9 @@ CREATE TABLE ratings (
     FOREIGN KEY (goodreads_book_id) REFERENCES books(goodreads_book_id)
 );
 
+-- Lookups by book (users_who_rated, top 5) cannot use the (user_id, goodreads_book_id) key
+CREATE INDEX ratings_goodreads_book_id_idx ON ratings (goodreads_book_id) INCLUDE (user_id, rating);
+
 -- Create the tags table
 CREATE TABLE tags (
     tag_id INTEGER PRIMARY KEY,
@@ -48,6 +51,8 @@ CREATE TABLE book_tags (
     FOREIGN KEY (tag_id) REFERENCES tags(tag_id)
 );
 
+CREATE INDEX book_tags_tag_id_idx ON book_tags (tag_id);
+
 -- Create the to_read table
 CREATE TABLE to_read (
     user_id INTEGER,
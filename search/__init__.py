@@ -0,0 +1,3 @@
+from .index import SearchIndex, build_index, build_index_from_csv, tokenize
+
+__all__ = ["SearchIndex", "build_index", "build_index_from_csv", "tokenize"]
@@ -0,0 +1,233 @@
+import json
+import os
+import re
+import shutil
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+TEXT_FIELDS = ("title", "original_title", "authors")
+FORMAT_VERSION = 1
+TOKEN = re.compile(r"\w+")
+# Each build goes to its own subdirectory; this file names the current one.
+CURRENT = "CURRENT"
+# Builds kept besides the current one, for processes that read CURRENT just before a switch.
+KEEP_PREVIOUS = 1
+
+
+def normalize(text) -> str:
+    """Lower-case and strip accents, so "Émile" and "emile" index alike."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text) -> list[str]:
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return []
+    return TOKEN.findall(normalize(text))
+
+
+def pack_strings(values: list[str]) -> tuple[bytes, np.ndarray]:
+    """Concatenated UTF-8 bytes and int64 offsets (len + 1), the layout used for every string column."""
+    encoded = [value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+class PackedStrings:
+    """Read-only sequence over packed strings; slices decode on access, so nothing is loaded up front."""
+
+    def __init__(self, data, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode()
+
+
+class RawKeys:
+    """bisect adapter: compares terms as UTF-8 bytes, whose order matches code point order."""
+
+    def __init__(self, strings: PackedStrings):
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.strings.raw(i)
+
+
+def build_index(books: pd.DataFrame, directory: str) -> str:
+    """Tokenize titles and authors and write a new build of the inverted index under directory.
+
+    The vocabulary is sorted, so prefix lookups are two binary searches; each
+    term's postings are sorted document numbers. Everything is stored as flat
+    arrays that SearchIndex memory-maps. Files that may be mapped are never
+    rewritten: the build goes to a fresh subdirectory and CURRENT is switched
+    to it atomically. Returns the build's path.
+    """
+    books = books.reset_index(drop=True)
+    fields = [field for field in TEXT_FIELDS if field in books]
+    tokens = pd.Series([sorted(set(token for field in fields for token in tokenize(value)))
+                        for value in zip(*(books[field] for field in fields))] if fields else [[]] * len(books))
+    pairs = pd.DataFrame({"doc": np.repeat(np.arange(len(books), dtype=np.int32), tokens.map(len).to_numpy()),
+                          "term": [token.encode() for doc_tokens in tokens for token in doc_tokens]})
+    pairs = pairs.sort_values(["term", "doc"], kind="stable")
+    terms, starts = np.unique(pairs["term"].to_numpy(dtype=object), return_index=True)
+    posting_offsets = np.append(starts, len(pairs)).astype(np.int64)
+
+    build = f"{time.time_ns()}-{os.getpid()}"
+    path = os.path.join(directory, build)
+    os.makedirs(path)
+    vocab, vocab_offsets = pack_strings([term.decode() for term in terms])
+    titles, title_offsets = pack_strings(books["title"].fillna("").astype(str).tolist()
+                                         if "title" in books else [""] * len(books))
+    authors, author_offsets = pack_strings(books["authors"].fillna("").astype(str).tolist()
+                                           if "authors" in books else [""] * len(books))
+    # Results are ordered by popularity, which is what search-as-you-type users expect.
+    rank = pd.to_numeric(books["ratings_count"], errors="coerce").fillna(0).to_numpy(dtype=np.int64) \
+        if "ratings_count" in books else np.zeros(len(books), dtype=np.int64)
+    arrays = {
+        "vocab_offsets": vocab_offsets, "postings": pairs["doc"].to_numpy(dtype=np.int32),
+        "posting_offsets": posting_offsets, "book_ids": books["book_id"].to_numpy(dtype=np.int64),
+        "rank": rank, "title_offsets": title_offsets, "author_offsets": author_offsets,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    for name, data in (("vocab", vocab), ("titles", titles), ("authors", authors)):
+        with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+            f.write(data)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"version": FORMAT_VERSION, "documents": len(books), "terms": len(terms)}, f)
+    pointer = os.path.join(directory, f"{CURRENT}.{os.getpid()}.tmp")
+    with open(pointer, "w") as f:
+        f.write(build)
+    os.replace(pointer, os.path.join(directory, CURRENT))
+    prune_builds(directory, build)
+    print(f"Search index built: {len(books)} books, {len(terms)} terms in {path}")
+    return path
+
+
+def prune_builds(directory: str, current: str):
+    """Delete builds older than the last KEEP_PREVIOUS. Processes that still map a deleted
+    build keep reading it; the files only disappear once they are unmapped."""
+    builds = sorted((name for name in os.listdir(directory)
+                     if name != current and os.path.isdir(os.path.join(directory, name))),
+                    key=lambda name: int(name.split("-")[0]) if name.split("-")[0].isdigit() else 0)
+    for name in builds[:max(len(builds) - KEEP_PREVIOUS, 0)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def current_build(directory: str) -> Optional[str]:
+    """Path of the build CURRENT points to, or None when nothing has been built."""
+    try:
+        with open(os.path.join(directory, CURRENT)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def build_index_from_csv(books_path: str, directory: str):
+    columns = {"book_id", "ratings_count", *TEXT_FIELDS}
+    build_index(pd.read_csv(books_path, usecols=lambda name: name in columns), directory)
+
+
+class SearchIndex:
+    """A memory-mapped index written by build_index.
+
+    Pages are loaded on first touch and shared between worker processes, so
+    opening it is instant and memory does not grow with the catalogue.
+    """
+
+    def __init__(self, directory: str, max_expansions: int = 200):
+        self.directory = directory
+        # A one-letter prefix can match thousands of terms; only the first max_expansions are used.
+        self.max_expansions = max_expansions
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Search index in {directory} has format {self.meta.get('version')}, "
+                             f"expected {FORMAT_VERSION}; rebuild it")
+
+        def array(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        def data(name):
+            path = os.path.join(directory, f"{name}.bin")
+            return np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else b""
+
+        self.vocab = PackedStrings(data("vocab"), array("vocab_offsets"))
+        self.postings = array("postings")
+        self.posting_offsets = array("posting_offsets")
+        self.book_ids = array("book_ids")
+        self.rank = array("rank")
+        self.titles = PackedStrings(data("titles"), array("title_offsets"))
+        self.authors = PackedStrings(data("authors"), array("author_offsets"))
+        self._keys = RawKeys(self.vocab)
+
+    @classmethod
+    def open(cls, directory: str) -> Optional["SearchIndex"]:
+        """The current build in directory, or None when none has been built yet."""
+        build = current_build(directory)
+        if build is None or not os.path.exists(os.path.join(build, "meta.json")):
+            return None
+        return cls(build)
+
+    def term_range(self, prefix: str) -> tuple[int, int]:
+        """Vocabulary positions [lo, hi) of the terms starting with prefix."""
+        raw = prefix.encode()
+        lo = bisect_left(self._keys, raw)
+        hi = bisect_left(self._keys, raw + b"\xff", lo)
+        return lo, hi
+
+    def docs(self, term: str, prefix: bool = False) -> np.ndarray:
+        """Sorted document numbers containing term (or any term starting with it)."""
+        lo, hi = self.term_range(term)
+        if not prefix:
+            hi = lo + 1 if lo < len(self.vocab) and self.vocab[lo] == term else lo
+        hi = min(hi, lo + self.max_expansions)
+        if hi <= lo:
+            return np.empty(0, dtype=np.int32)
+        if hi == lo + 1:
+            return np.asarray(self.postings[self.posting_offsets[lo]:self.posting_offsets[lo + 1]])
+        return np.unique(np.concatenate([self.postings[self.posting_offsets[i]:self.posting_offsets[i + 1]]
+                                         for i in range(lo, hi)]))
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Books matching every word of query, the last word as a prefix, most-rated first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        matches = None
+        for i, token in enumerate(tokens):
+            docs = self.docs(token, prefix=i == len(tokens) - 1)
+            matches = docs if matches is None else np.intersect1d(matches, docs, assume_unique=True)
+            if not len(matches):
+                return []
+        rank = self.rank[matches]
+        if len(matches) > limit:
+            top = np.argpartition(-rank, limit - 1)[:limit]
+            matches, rank = matches[top], rank[top]
+        order = np.argsort(-rank, kind="stable")
+        return [{"book_id": int(self.book_ids[doc]), "title": self.titles[doc], "authors": self.authors[doc],
+                 "ratings_count": int(self.rank[doc])} for doc in matches[order]]
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """Vocabulary terms starting with prefix, for autocomplete suggestions."""
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        lo, hi = self.term_range(tokens[-1])
+        return [self.vocab[i] for i in range(lo, min(hi, lo + limit))]
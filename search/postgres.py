@@ -0,0 +1,64 @@
+from sqlalchemy import text
+
+from search.index import tokenize
+
+# GIN indexes behind /api/search?mode=postgres; create them once with `python -m search.postgres`.
+SEARCH_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS books_search_tsv_idx ON books "
+    "USING GIN (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(authors, '')))",
+    "CREATE INDEX IF NOT EXISTS books_title_trgm_idx ON books USING GIN (lower(title) gin_trgm_ops)",
+]
+
+# The expression must match books_search_tsv_idx for the planner to use the index.
+FULL_TEXT_QUERY = """
+SELECT {id_column} AS book_id, title, authors, ratings_count
+FROM books
+WHERE to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(authors, '')) @@ to_tsquery('simple', :query)
+ORDER BY ratings_count DESC NULLS LAST
+LIMIT :limit
+"""
+
+# Typo-tolerant fallback on titles, served by books_title_trgm_idx.
+TRIGRAM_QUERY = """
+SELECT {id_column} AS book_id, title, authors, ratings_count
+FROM books
+WHERE lower(title) % :text
+ORDER BY similarity(lower(title), :text) DESC, ratings_count DESC NULLS LAST
+LIMIT :limit
+"""
+
+
+def create_search_indexes(engine):
+    with engine.begin() as conn:
+        for statement in SEARCH_INDEXES:
+            conn.execute(text(statement))
+    print("PostgreSQL search indexes created.")
+
+
+def prefix_tsquery(query: str) -> str:
+    """AND of the query's words with the last one as a prefix: "dune mess" -> "dune & mess:*"."""
+    tokens = tokenize(query)
+    # tokenize() keeps only word characters, so nothing here can break tsquery syntax.
+    return " & ".join(tokens[:-1] + [f"{tokens[-1]}:*"]) if tokens else ""
+
+
+def search_postgres(engine, query: str, limit: int = 10, id_column: str = "book_id") -> list[dict]:
+    """Full-text prefix search, falling back to trigram similarity when nothing matches."""
+    tsquery = prefix_tsquery(query)
+    if not tsquery:
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(text(FULL_TEXT_QUERY.format(id_column=id_column)),
+                            {"query": tsquery, "limit": limit}).fetchall()
+        if not rows:
+            rows = conn.execute(text(TRIGRAM_QUERY.format(id_column=id_column)),
+                                {"text": query.lower(), "limit": limit}).fetchall()
+    return [dict(row._mapping) for row in rows]
+
+
+if __name__ == "__main__":
+    from db.config import DatabaseSettings
+    from sqlalchemy import create_engine
+
+    create_search_indexes(create_engine(DatabaseSettings.from_env().postgres_url))
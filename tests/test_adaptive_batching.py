@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from ingest.adaptive_batching import AdaptiveBatchSizer, BatchSizeStore
+
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+    def test_grows_while_throughput_holds(self):
+        sizer = AdaptiveBatchSizer(initial=1000, increase_step=500, max_size=10_000)
+        for _ in range(4):
+            sizer.record(sizer.size, sizer.size / 10_000)  # constant 10k rows/s
+        self.assertEqual(sizer.size, 3000)
+
+    def test_shrinks_when_throughput_drops(self):
+        sizer = AdaptiveBatchSizer(initial=4000, increase_step=1000)
+        sizer.record(4000, 0.4)  # 10k rows/s
+        self.assertEqual(sizer.size, 5000)
+        sizer.record(5000, 5.0)  # 1k rows/s
+        self.assertEqual(sizer.size, 2500)
+
+    def test_shrinks_on_failure_and_latency_target(self):
+        sizer = AdaptiveBatchSizer(initial=1000, min_size=100, target_latency=1.0)
+        sizer.record(1000, 0.1, failed=True)
+        self.assertEqual(sizer.size, 500)
+        sizer.record(500, 2.0)
+        self.assertEqual(sizer.size, 250)
+        for _ in range(5):
+            sizer.record(0, 0.0, failed=True)
+        self.assertEqual(sizer.size, 100)
+
+    def test_partial_batches_do_not_change_size(self):
+        sizer = AdaptiveBatchSizer(initial=1000)
+        sizer.record(10, 0.001)
+        self.assertEqual(sizer.size, 1000)
+
+    def test_memory_limit_caps_size(self):
+        sizer = AdaptiveBatchSizer(initial=50_000, max_batch_bytes=1_000_000)
+        sizer.observe_row_bytes(100)
+        self.assertEqual(sizer.size, 10_000)
+
+
+class TestBatchSizeStore(unittest.TestCase):
+    def test_sizes_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sizes.json")
+            store = BatchSizeStore(path)
+            store.sizer("ClickHouse", "ratings", initial=1000).size = 64_000
+            store.save()
+
+            reloaded = BatchSizeStore(path)
+            self.assertEqual(reloaded.sizer("ClickHouse", "ratings", initial=1000).size, 64_000)
+            self.assertEqual(reloaded.sizer("Neo4j", "ratings", initial=1000).size, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
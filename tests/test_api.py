@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from decimal import Decimal
+
+import pandas as pd
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Numeric, literal, select
+
+import main
+from cache import DatasetVersion
+from db.config import DatabaseSettings
+from db.connection_manager import ConnectionManager
+from search import build_index
+
+
+class TestBatchEndpoints(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(cls.tmp.name, "api.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, user_name TEXT)")
+            conn.execute("CREATE TABLE ratings (user_id INTEGER, book_id INTEGER, rating INTEGER)")
+            conn.executemany("INSERT INTO users VALUES (?, ?)", [(1, "ann"), (2, "bob"), (3, "cy")])
+            conn.executemany("INSERT INTO ratings VALUES (?, ?, ?)",
+                             [(1, 10, 5), (1, 11, 3), (2, 10, 4), (3, 12, 1)])
+        cls.saved = main.connections
+        main.connections = ConnectionManager(DatabaseSettings(postgres_url=f"sqlite:///{db_path}"))
+        main.reflected.clear()
+        main.reflected_tables.clear()
+        main.get_routing.cache_clear()
+        cls.client = TestClient(main.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        main.connections.close()
+        main.connections = cls.saved
+        main.reflected.clear()
+        main.reflected_tables.clear()
+        main.get_routing.cache_clear()
+        cls.tmp.cleanup()
+
+    def test_ratings_grouped_by_user(self):
+        response = self.client.post("/api/relational/ratings_by_user", json={"ids": [2, 1, 99, 1]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(list(body), ["2", "1", "99"])
+        self.assertEqual(sorted(row["book_id"] for row in body["1"]), [10, 11])
+        self.assertEqual(body["99"], [])
+
+    def test_users_grouped_by_book(self):
+        body = self.client.post("/api/relational/users_who_rated", json={"ids": [10, 12]}).json()
+        self.assertEqual(sorted(row["user_name"] for row in body["10"]), ["ann", "bob"])
+        self.assertEqual([row["user_id"] for row in body["12"]], [3])
+
+    def test_batch_size_limit(self):
+        ids = list(range(main.MAX_BATCH_IDS + 1))
+        self.assertEqual(self.client.post("/api/relational/ratings_by_user", json={"ids": ids}).status_code, 422)
+        self.assertEqual(self.client.post("/api/relational/ratings_by_user", json={"ids": []}).status_code, 422)
+
+    def test_rows_response_encodes_decimals(self):
+        engine = main.connections.client("postgres").engine
+        users = main.get_table(engine, "users")
+        query = select(users.c.user_id, literal(Decimal("4.25"), Numeric(3, 2)).label("rating")).order_by("user_id")
+        with engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        self.assertIsInstance(rows[0].rating, Decimal)
+        response = main.rows_response(rows)
+        self.assertEqual(response.body, b'[{"user_id":1,"rating":4.25},{"user_id":2,"rating":4.25},'
+                                        b'{"user_id":3,"rating":4.25}]')
+        self.assertEqual(main.rows_response([]).body, b"[]")
+
+
+class TestSearchIndexReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = main.SEARCH_INDEX_DIR, main.dataset_version
+        main.SEARCH_INDEX_DIR = os.path.join(self.tmp.name, ".search_index")
+        main.dataset_version = DatasetVersion(os.path.join(self.tmp.name, ".dataset_version.json"))
+
+    def tearDown(self):
+        main.SEARCH_INDEX_DIR, main.dataset_version = self.saved
+        main.open_search_index.cache_clear()
+        self.tmp.cleanup()
+
+    def test_index_is_mapped_at_startup(self):
+        build_index(pd.DataFrame({"book_id": [1], "title": ["Emma"]}), main.SEARCH_INDEX_DIR)
+        main.dataset_version.bump()
+        with TestClient(main.app) as client:
+            self.assertEqual(main.open_search_index.cache_info().currsize, 1)
+            self.assertEqual([r["book_id"] for r in client.get("/api/search?q=emm").json()["results"]], [1])
+
+    def test_reopened_after_a_load(self):
+        build_index(pd.DataFrame({"book_id": [1], "title": ["Emma"]}), main.SEARCH_INDEX_DIR)
+        main.dataset_version.bump()
+        first = main.get_search_index()
+        self.assertIs(main.get_search_index(), first)
+        build_index(pd.DataFrame({"book_id": [2], "title": ["Dune"]}), main.SEARCH_INDEX_DIR)
+        main.dataset_version.bump()
+        self.assertEqual([r["book_id"] for r in main.get_search_index().search("dune")], [2])
+        self.assertEqual([r["book_id"] for r in first.search("emma")], [1])
+
+
+class TestGenreIndexReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        pd.DataFrame({"tag_id": [1], "tag_name": ["fantasy"]}).to_csv(os.path.join(self.tmp.name, "tags.csv"))
+        pd.DataFrame({"goodreads_book_id": [100], "tag_id": [1], "count": [10]}).to_csv(
+            os.path.join(self.tmp.name, "book_tags.csv"))
+        pd.DataFrame({"book_id": [1], "goodreads_book_id": [100]}).to_csv(os.path.join(self.tmp.name, "books.csv"))
+        self.db_path = os.path.join(self.tmp.name, "dw.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE fact_ratings (user_id INTEGER, book_id INTEGER, rating INTEGER)")
+            conn.execute("INSERT INTO fact_ratings VALUES (1, 1, 5)")
+        self.saved = main.connections, main.DATA_DIR, main.dataset_version
+        main.connections = ConnectionManager(DatabaseSettings(postgres_url=f"sqlite:///{self.db_path}"))
+        main.DATA_DIR = self.tmp.name
+        main.dataset_version = DatasetVersion(os.path.join(self.tmp.name, ".dataset_version.json"))
+        main.reflected.clear()
+        main.reflected_tables.clear()
+        main.get_routing.cache_clear()
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        main.connections.close()
+        main.connections, main.DATA_DIR, main.dataset_version = self.saved
+        main.reflected.clear()
+        main.reflected_tables.clear()
+        main.get_routing.cache_clear()
+        main.build_genre_index.cache_clear()
+        self.tmp.cleanup()
+
+    def test_rating_counts_follow_reloads(self):
+        main.dataset_version.bump()
+        self.assertEqual(self.client.get("/api/dw/ratings_for_genre/Fantasy").json()["total_ratings"], 1)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO fact_ratings VALUES (2, 1, 4)")
+        self.assertEqual(self.client.get("/api/dw/ratings_for_genre/Fantasy").json()["total_ratings"], 1)
+        main.dataset_version.bump()
+        self.assertEqual(self.client.get("/api/dw/ratings_for_genre/Fantasy").json()["total_ratings"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
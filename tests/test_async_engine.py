@@ -0,0 +1,59 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from db.async_clients import AsyncDatabaseClient
+from db.config import DatabaseSettings
+from ingest.async_engine import AsyncIngestEngine
+from metrics.pipeline_metrics import PipelineMetrics
+
+
+class RecordingClient(AsyncDatabaseClient):
+    rows: int = 0
+    active: int = 0
+    peak: int = 0
+    fail_first: bool = False
+    closed: bool = False
+
+    async def connect(self):
+        pass
+
+    async def insert_data(self, table_name: str, data: list[dict]):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_first:
+                self.fail_first = False
+                raise RuntimeError("transient")
+            self.rows += len(data)
+        finally:
+            self.active -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncIngestEngine(unittest.TestCase):
+    def test_batches_in_flight_are_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ratings.csv")
+            with open(path, "w") as f:
+                f.write("user_id,book_id,rating\n")
+                f.writelines(f"{i},{i % 7},{i % 5}\n" for i in range(100))
+            clients = {"PostgreSQL": RecordingClient(connection_string="fake"),
+                       "MongoDB": RecordingClient(connection_string="fake", fail_first=True)}
+            engine = AsyncIngestEngine(["PostgreSQL", "MongoDB"], DatabaseSettings(), PipelineMetrics(),
+                                       chunk_size=10, inflight=3, max_retries=1, retry_backoff=0, clients=clients)
+            asyncio.run(engine.run([path]))
+        for client in clients.values():
+            self.assertEqual(client.rows, 100)
+            self.assertLessEqual(client.peak, 3)
+            self.assertTrue(client.closed)
+        self.assertEqual(clients["PostgreSQL"].peak, 3)
+        self.assertEqual(engine.failed_rows, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
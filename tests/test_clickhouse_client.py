@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+
+from db.clickhouse_client import ClickhouseClient, DriverPool
+
+
+class FakeDriver:
+    """Fails if two threads use it at once, like clickhouse_driver.Client."""
+
+    def __init__(self):
+        self.busy = False
+        self.queries = []
+        self.closed = False
+
+    def execute(self, query, params=None, **kwargs):
+        if self.busy:
+            raise RuntimeError("Simultaneous queries on single connection detected")
+        self.busy = True
+        time.sleep(0.01)
+        self.queries.append(query)
+        self.busy = False
+        return [(1,)]
+
+    def disconnect(self):
+        self.closed = True
+
+
+class TestDriverPool(unittest.TestCase):
+    def setUp(self):
+        self.drivers = []
+
+        def factory():
+            self.drivers.append(FakeDriver())
+            return self.drivers[-1]
+
+        self.client = ClickhouseClient(connection_string="clickhouse://localhost", pool_size=3, max_overflow=1)
+        self.client.pool = DriverPool(factory, 4, timeout=1.0)
+
+    def test_threads_get_their_own_driver(self):
+        errors = []
+
+        def query():
+            try:
+                self.client.execute("SELECT 1")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=query) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.drivers), 4)
+        self.assertEqual(sum(len(driver.queries) for driver in self.drivers), 16)
+
+    def test_drivers_are_reused_and_closed(self):
+        self.client.execute("SELECT 1")
+        self.client.execute("SELECT 2")
+        self.assertEqual(len(self.drivers), 1)
+        self.client.close()
+        self.assertTrue(self.drivers[0].closed)
+        self.assertIsNone(self.client.pool)
+
+    def test_waits_at_most_the_timeout(self):
+        pool = DriverPool(FakeDriver, 1, timeout=0.05)
+        with pool.acquire():
+            with self.assertRaises(TimeoutError):
+                with pool.acquire():
+                    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
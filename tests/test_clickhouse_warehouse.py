@@ -0,0 +1,70 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from db.clickhouse_client import ClickhouseClient, DriverPool
+from warehouse.clickhouse_warehouse import FACT_COLUMNS, ClickhouseWarehouse
+from warehouse.etl import UNKNOWN_TIME_ID, StarSchemaETL
+
+
+class RecordingDriver:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, query, params=None, **kwargs):
+        self.calls.append((" ".join(query.split()), params))
+        return []
+
+    def disconnect(self):
+        pass
+
+
+class TestSyncFromPostgres(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE dim_users (user_id INT PRIMARY KEY, user_name TEXT)"))
+            conn.execute(text("CREATE TABLE dim_books (book_id INT PRIMARY KEY, title TEXT, genre TEXT)"))
+            conn.execute(text("CREATE TABLE dim_time (time_id INT PRIMARY KEY, date TEXT)"))
+            conn.execute(text("CREATE TABLE fact_ratings (rating_id INTEGER PRIMARY KEY, user_id INT, "
+                              "book_id INT, time_id INT, rating REAL)"))
+        users = [{"user_id": 1, "user_name": "User1"}]
+        # No year, a year before 1970 and one before the common era.
+        books = [{"book_id": 1, "title": "A", "original_publication_year": float("nan")},
+                 {"book_id": 2, "title": "B", "original_publication_year": 1813.0},
+                 {"book_id": 3, "title": "C", "original_publication_year": -720.0}]
+        ratings = [{"user_id": 1, "book_id": book_id, "rating": 4} for book_id in (1, 2, 3)]
+        StarSchemaETL(engine=self.engine).run(users, books, ratings)
+        self.driver = RecordingDriver()
+        client = ClickhouseClient(connection_string="clickhouse://localhost")
+        client.pool = DriverPool(lambda: self.driver, 1, timeout=1.0)
+        self.warehouse = ClickhouseWarehouse(client=client)
+
+    def inserts(self, table_name):
+        return [params for query, params in self.driver.calls if query.startswith(f"INSERT INTO {table_name} ")]
+
+    def test_unknown_and_early_dates_are_kept(self):
+        self.warehouse.sync_from_postgres(self.engine)
+        [time_rows] = self.inserts("dim_time")
+        self.assertEqual(sorted(time_rows), [(-7199899, "-720-01-01"), (UNKNOWN_TIME_ID, None),
+                                             (18130101, "1813-01-01")])
+        [facts] = self.inserts("fact_ratings")
+        self.assertEqual(len(facts[0]), len(FACT_COLUMNS))
+        self.assertEqual(sorted(row[2] for row in facts), [-7199899, UNKNOWN_TIME_ID, 18130101])
+
+    def test_every_sync_is_a_full_refresh(self):
+        self.warehouse.sync_from_postgres(self.engine)
+        self.warehouse.sync_from_postgres(self.engine)
+        queries = [query for query, _ in self.driver.calls]
+        second = queries[len(queries) // 2:]
+        truncated = [query.split()[-1] for query in second if query.startswith("TRUNCATE")]
+        self.assertEqual(set(truncated), {"fact_ratings", "agg_book_ratings", "agg_daily_ratings",
+                                          "agg_genre_daily_ratings", "dim_users", "dim_books", "dim_time"})
+        # The tables are emptied before anything of the second sync is inserted.
+        first_insert = next(i for i, query in enumerate(second) if query.startswith("INSERT"))
+        self.assertEqual(first_insert, len(truncated))
+        self.assertEqual(len(self.inserts("fact_ratings")), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import threading
+import unittest
+from decimal import Decimal
+
+from benchmarks.compare_stores import compare_query, fan_out, normalize
+
+
+class FakeBackend:
+    def __init__(self, user_ids, delay=None):
+        self.user_ids = user_ids
+        self.delay = delay
+
+    def users_who_rated(self, book_id):
+        if self.delay:
+            self.delay.wait(5)
+        if self.user_ids is None:
+            raise ConnectionError("store down")
+        return [{"user_id": user_id} for user_id in self.user_ids]
+
+
+class TestCompareStores(unittest.TestCase):
+    def test_fan_out_tolerates_failures_and_timeouts(self):
+        release = threading.Event()
+        results = fan_out({"fast": lambda: 1, "broken": lambda: 1 / 0, "hung": lambda: release.wait(5)}, 0.2)
+        release.set()
+        self.assertEqual(results["fast"].status, "ok")
+        self.assertEqual(results["fast"].value, 1)
+        self.assertEqual(results["broken"].status, "error")
+        self.assertIn("ZeroDivisionError", results["broken"].error)
+        self.assertEqual(results["hung"].status, "timeout")
+
+    def test_agreement_against_reference(self):
+        backends = {"postgres": FakeBackend([3, 1]), "mongo": FakeBackend([1, 3]),
+                    "neo4j": FakeBackend([1]), "mssql": FakeBackend(None)}
+        report = compare_query({name: (lambda b=b: b) for name, b in backends.items()},
+                               "users_who_rated", (1,), repeat=2, timeout=2)
+        stores = report["stores"]
+        self.assertEqual(report["reference"], "postgres")
+        self.assertIn(report["fastest"], {"postgres", "mongo", "neo4j"})
+        self.assertEqual([stores[name]["agrees"] for name in ("postgres", "mongo", "neo4j", "mssql")],
+                         [True, True, False, None])
+        self.assertEqual((stores["mssql"]["status"], stores["mssql"]["failures"]), ("error", 2))
+        self.assertEqual(stores["neo4j"]["rows"], 1)
+
+    def test_numeric_types_compare_equal(self):
+        self.assertEqual(normalize("top_n", [{"avg_rating": Decimal("4.50")}]),
+                         normalize("top_n", [{"avg_rating": 4.5}]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from db.config import DatabaseSettings
+from db.connection_manager import ConnectionManager
+
+
+class TestDatabaseSettings(unittest.TestCase):
+    def test_environment_and_keyword_overrides(self):
+        settings = DatabaseSettings.from_env({"POSTGRES_URL": "postgresql://env/db", "DB_POOL_SIZE": "12"},
+                                             max_overflow=0)
+        self.assertEqual(settings.postgres_url, "postgresql://env/db")
+        self.assertEqual(settings.pool_size, 12)
+        self.assertEqual(settings.max_overflow, 0)
+        self.assertEqual(settings.url("neo4j"), "bolt://localhost:7687")
+
+
+class TestConnectionManager(unittest.TestCase):
+    def test_clients_are_shared_and_closed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+            connections = ConnectionManager(DatabaseSettings(postgres_url=url), workers=8)
+            self.assertEqual(connections.connected(), [])
+            client = connections.client("postgres")
+            self.assertIs(connections.client("postgres"), client)
+            self.assertEqual(client.engine.pool.size(), 8)
+            engine = client.engine
+            self.assertEqual(connections.health_check(), {"postgres": True})
+            self.assertIs(client.engine, engine)
+            connections.close()
+            self.assertIsNone(client.engine)
+            self.assertEqual(connections.connected(), [])
+
+    def test_unknown_database(self):
+        with self.assertRaises(KeyError):
+            ConnectionManager().client("sqlite")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from cache import DatasetVersion
+from data_pipeline import DataPipeline, select_sinks
+from db.config import DatabaseSettings
+from db.connection_manager import ConnectionManager
+
+
+class TestSinkSelection(unittest.TestCase):
+    def test_names_are_resolved(self):
+        self.assertEqual(select_sinks(None), ["PostgreSQL", "MongoDB", "Neo4j", "ClickHouse", "MSSQL"])
+        self.assertEqual(select_sinks(["clickhouse", "PostgreSQL", "postgres"]), ["ClickHouse", "PostgreSQL"])
+        with self.assertRaises(ValueError):
+            select_sinks(["redis"])
+
+
+class TestSingleSinkRun(unittest.TestCase):
+    def test_only_selected_sink_is_loaded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "ratings.csv"), "w") as f:
+                f.write("user_id,book_id,rating\n1,10,5\n1,11,3\n2,10,4\n")
+            db_path = os.path.join(tmp, "sink.db")
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("CREATE TABLE ratings (user_id INT, book_id INT, rating INT)")
+            with ConnectionManager(DatabaseSettings(postgres_url=f"sqlite:///{db_path}")) as connections:
+                DataPipeline(download_dir=tmp, chunk_size=2, connections=connections, sinks=["postgres"]).run()
+                self.assertEqual(connections.connected(), ["postgres"])
+            with sqlite3.connect(db_path) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM ratings").fetchone()[0], 3)
+            # Each load bumps the dataset version the API's ETags come from.
+            self.assertEqual(DatasetVersion(os.path.join(tmp, ".dataset_version.json")).read()[0], 1)
+
+    def test_ratings_are_copied_to_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "ratings.csv"), "w") as f:
+                f.write("user_id,book_id,rating\n" + "".join(f"{user_id},10,5\n" for user_id in range(1, 11)))
+            db_path = os.path.join(tmp, "sink.db")
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("CREATE TABLE ratings (user_id INT, book_id INT, rating INT)")
+            shard_paths = [os.path.join(tmp, f"shard{i}.db") for i in range(2)]
+            settings = DatabaseSettings(postgres_url=f"sqlite:///{db_path}",
+                                        ratings_shard_urls=[f"sqlite:///{path}" for path in shard_paths])
+            with ConnectionManager(settings) as connections:
+                DataPipeline(download_dir=tmp, chunk_size=4, connections=connections, sinks=["postgres"]).run()
+            user_ids = []
+            for path in shard_paths:
+                with sqlite3.connect(path) as conn:
+                    user_ids += [row[0] for row in conn.execute("SELECT user_id FROM ratings")]
+            self.assertEqual(sorted(user_ids), list(range(1, 11)))
+
+
+if __name__ == '__main__':
+    unittest.main()
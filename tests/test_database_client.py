@@ -0,0 +1,158 @@
+import importlib.util
+import unittest
+
+from sqlalchemy import Column, Integer, MetaData, Numeric, Table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from db.database_client import dedupe_rows
+from db.mssql_client import MSSQLClient
+from db.postgre_sql_client import PostgreSQLClient
+
+HAS_PYMONGO = importlib.util.find_spec("pymongo") is not None
+HAS_NEO4J = importlib.util.find_spec("neo4j") is not None and importlib.util.find_spec("bson") is not None
+
+BATCH = [{"user_id": 1, "book_id": 10, "rating": 3},
+         {"user_id": 2, "book_id": 10, "rating": 4},
+         {"user_id": 1, "book_id": 10, "rating": 5}]
+
+
+def ratings_table() -> Table:
+    return Table("ratings", MetaData(), Column("user_id", Integer), Column("book_id", Integer),
+                 Column("rating", Numeric(3, 2)))
+
+
+def to_read_table() -> Table:
+    return Table("to_read", MetaData(), Column("user_id", Integer), Column("book_id", Integer))
+
+
+class TestDedupeRows(unittest.TestCase):
+    def test_last_row_per_key_wins(self):
+        self.assertEqual(dedupe_rows(BATCH, ["user_id", "book_id"]),
+                         [{"user_id": 1, "book_id": 10, "rating": 5}, {"user_id": 2, "book_id": 10, "rating": 4}])
+
+    def test_unique_batches_are_returned_as_is(self):
+        data = [{"tag_id": 1}, {"tag_id": 2}]
+        self.assertIs(dedupe_rows(data, ["tag_id"]), data)
+
+
+class TestPostgresUpsert(unittest.TestCase):
+    def compile(self, clause) -> str:
+        return " ".join(str(clause.compile(dialect=postgresql.dialect())).split())
+
+    def test_stage_and_on_conflict_update(self):
+        stage, statement = PostgreSQLClient.upsert_statements(ratings_table(), ["user_id", "book_id", "rating"],
+                                                              ["user_id", "book_id"])
+        self.assertEqual(self.compile(CreateTable(stage)),
+                         "CREATE TEMPORARY TABLE ratings_stage ( user_id INTEGER, book_id INTEGER, "
+                         "rating NUMERIC(3, 2) ) ON COMMIT DROP")
+        self.assertEqual(self.compile(statement),
+                         "INSERT INTO ratings (user_id, book_id, rating) "
+                         "SELECT ratings_stage.user_id, ratings_stage.book_id, ratings_stage.rating "
+                         "FROM ratings_stage ON CONFLICT (user_id, book_id) DO UPDATE SET rating = excluded.rating")
+
+    def test_key_only_table_does_nothing_on_conflict(self):
+        _, statement = PostgreSQLClient.upsert_statements(to_read_table(), ["user_id", "book_id"],
+                                                          ["user_id", "book_id"])
+        self.assertTrue(self.compile(statement).endswith("ON CONFLICT (user_id, book_id) DO NOTHING"))
+
+
+class TestMSSQLMerge(unittest.TestCase):
+    def test_composite_key_merge(self):
+        stage, merge = MSSQLClient.merge_statements(ratings_table(), ["user_id", "book_id", "rating"],
+                                                    ["user_id", "book_id"])
+        self.assertEqual(stage.name, "#ratings_stage")
+        self.assertEqual(list(stage.c.keys()), ["user_id", "book_id", "rating"])
+        self.assertEqual(merge,
+                         "MERGE INTO [ratings] WITH (HOLDLOCK) AS t USING [#ratings_stage] AS s "
+                         "ON t.[user_id] = s.[user_id] AND t.[book_id] = s.[book_id] "
+                         "WHEN MATCHED THEN UPDATE SET t.[rating] = s.[rating] "
+                         "WHEN NOT MATCHED THEN INSERT ([user_id], [book_id], [rating]) "
+                         "VALUES (s.[user_id], s.[book_id], s.[rating]);")
+
+    def test_key_only_table_only_inserts(self):
+        _, merge = MSSQLClient.merge_statements(to_read_table(), ["user_id", "book_id"], ["user_id", "book_id"])
+        self.assertNotIn("WHEN MATCHED", merge)
+        self.assertEqual(merge,
+                         "MERGE INTO [to_read] WITH (HOLDLOCK) AS t USING [#to_read_stage] AS s "
+                         "ON t.[user_id] = s.[user_id] AND t.[book_id] = s.[book_id] "
+                         "WHEN NOT MATCHED THEN INSERT ([user_id], [book_id]) VALUES (s.[user_id], s.[book_id]);")
+
+
+class FakeCollection:
+    def __init__(self):
+        self.indexes = []
+        self.writes = []
+
+    def create_index(self, keys):
+        self.indexes.append(keys)
+
+    def bulk_write(self, operations, ordered=True):
+        self.writes.append((operations, ordered))
+
+
+@unittest.skipUnless(HAS_PYMONGO, "pymongo is not installed")
+class TestMongoUpsert(unittest.TestCase):
+    def test_one_unordered_bulk_write_of_upserts(self):
+        from pymongo import UpdateOne
+        from db.mongo_db_client import MongoDBClient
+
+        collection = FakeCollection()
+        client = MongoDBClient(connection_string="mongodb://localhost")
+        client.client, client.db = object(), {"ratings": collection}
+        client.upsert_data("ratings", BATCH, ["user_id", "book_id"])
+        client.upsert_data("ratings", BATCH[:1], ["user_id", "book_id"])
+        # The key index is created once per collection and key.
+        self.assertEqual(collection.indexes, [[("user_id", 1), ("book_id", 1)]])
+        operations, ordered = collection.writes[0]
+        self.assertFalse(ordered)
+        self.assertEqual(operations, [
+            UpdateOne({"user_id": 1, "book_id": 10}, {"$set": {"user_id": 1, "book_id": 10, "rating": 5}}, upsert=True),
+            UpdateOne({"user_id": 2, "book_id": 10}, {"$set": {"user_id": 2, "book_id": 10, "rating": 4}}, upsert=True),
+        ])
+
+
+class FakeSession:
+    def __init__(self, runs):
+        self.runs = runs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        self.runs.append((" ".join(query.split()), params))
+
+
+class FakeDriver:
+    def __init__(self):
+        self.runs = []
+
+    def session(self):
+        return FakeSession(self.runs)
+
+
+@unittest.skipUnless(HAS_NEO4J, "the neo4j driver is not installed")
+class TestNeo4jUpsert(unittest.TestCase):
+    def test_one_unwind_merge_per_batch(self):
+        from db.neo4j_client import Neo4jClient
+
+        client = Neo4jClient(connection_string="bolt://localhost:7687")
+        client.driver = FakeDriver()
+        client.upsert_data("Rating", BATCH, ["user_id", "book_id"])
+        client.upsert_data("Rating", BATCH[1:], ["user_id", "book_id"])
+        runs = client.driver.runs
+        self.assertEqual(runs[0], ("CREATE INDEX rating_user_id_book_id_idx IF NOT EXISTS "
+                                   "FOR (n:Rating) ON (n.user_id, n.book_id)", {}))
+        merge = "UNWIND $rows AS row MERGE (n:Rating {user_id: row.user_id, book_id: row.book_id}) SET n += row"
+        self.assertEqual(runs[1], (merge, {"rows": [{"user_id": 1, "book_id": 10, "rating": 5},
+                                                    {"user_id": 2, "book_id": 10, "rating": 4}]}))
+        # The index is only created for the first batch.
+        self.assertEqual(runs[2], (merge, {"rows": BATCH[1:]}))
+        self.assertEqual(len(runs), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
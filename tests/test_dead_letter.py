@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import subprocess
+import tempfile
+import unittest
+
+from data_pipeline import DataPipeline
+from db.config import DatabaseSettings
+from db.connection_manager import ConnectionManager
+from db.database_client import PartialWriteError
+from ingest.dead_letter import DeadLetterQueue, bisect_batch
+
+
+class IntegrityError(Exception):
+    pass
+
+
+class OperationalError(Exception):
+    pass
+
+
+class TestBisectBatch(unittest.TestCase):
+    def test_isolates_bad_rows(self):
+        rows = [{"id": i, "title": None if i in (3, 17) else f"t{i}"} for i in range(32)]
+        written = []
+        calls = []
+
+        def write(batch):
+            calls.append(len(batch))
+            if any(row["title"] is None for row in batch):
+                raise IntegrityError("NOT NULL constraint failed: books.title")
+            written.extend(batch)
+
+        count, dead = bisect_batch(write, rows, IntegrityError("first attempt"))
+        self.assertEqual(count, 30)
+        self.assertEqual(sorted(row["id"] for row in written), [i for i in range(32) if i not in (3, 17)])
+        self.assertEqual([row["id"] for row, _ in dead], [3, 17])
+        self.assertIn("NOT NULL", dead[0][1])
+        self.assertLess(len(calls), 2 * 2 * 5 + 2)
+
+    def test_partial_write_and_batch_errors(self):
+        rows = [{"id": i} for i in range(4)]
+        count, dead = bisect_batch(lambda batch: None, rows, PartialWriteError({2: "duplicate key"}))
+        self.assertEqual((count, dead), (3, [({"id": 2}, "duplicate key")]))
+        with self.assertRaises(OperationalError):
+            bisect_batch(lambda batch: (_ for _ in ()).throw(OperationalError("server gone")), rows,
+                         IntegrityError("bad row"))
+        # A failed bcp run does not say which rows were bad, so its batch is not split up.
+        with self.assertRaises(subprocess.CalledProcessError):
+            bisect_batch(lambda batch: None, rows, subprocess.CalledProcessError(1, ["bcp"]))
+
+    def test_queue_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = DeadLetterQueue(tmp)
+            queue.write("MSSQL", "books", [({"isbn": "x" * 30, "rating": float("nan")}, "DataError: truncated")])
+            records = queue.read("MSSQL", "books")
+        self.assertEqual(records[0]["row"], {"isbn": "x" * 30, "rating": None})
+        self.assertEqual(records[0]["error"], "DataError: truncated")
+
+
+class TestPipelineDeadLetters(unittest.TestCase):
+    def test_good_rows_are_loaded_and_bad_rows_kept(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "books.csv"), "w") as f:
+                f.write("book_id,title\n" + "".join(f"{i},{'' if i % 40 == 7 else f'Book {i}'}\n" for i in range(100)))
+            db_path = os.path.join(tmp, "sink.db")
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("CREATE TABLE books (book_id INT, title TEXT NOT NULL)")
+            with ConnectionManager(DatabaseSettings(postgres_url=f"sqlite:///{db_path}")) as connections:
+                pipeline = DataPipeline(download_dir=tmp, chunk_size=50, connections=connections, sinks=["postgres"])
+                pipeline.run()
+            with sqlite3.connect(db_path) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM books").fetchone()[0], 97)
+            dead = pipeline.dead_letters.read("PostgreSQL", "books")
+            self.assertEqual(sorted(record["row"]["book_id"] for record in dead), [7, 47, 87])
+            self.assertEqual(pipeline.metrics.rows_dead_lettered.value(sink="PostgreSQL", table="books"), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+import pandas as pd
+
+from warehouse.genre_index import GenreIndex
+
+
+class TestGenreIndex(unittest.TestCase):
+    def setUp(self):
+        tags = pd.DataFrame({"tag_id": [1, 2, 3, 4], "tag_name": ["to-read", "Fantasy", "young_adult", "ya"]})
+        book_tags = pd.DataFrame({"goodreads_book_id": [100, 100, 100, 200, 200, 300, 300],
+                                  "tag_id": [1, 2, 3, 2, 1, 4, 2],
+                                  "count": [1000, 400, 300, 50, 900, 80, 2]})
+        books = pd.DataFrame({"book_id": [1, 2, 3], "goodreads_book_id": [100, 200, 300]})
+        self.index = GenreIndex.build(tags, book_tags, books)
+
+    def test_postings_and_intersections(self):
+        # Book 3's fantasy shelf (2 of 80 readers) is below the 5% share and ignored.
+        self.assertEqual(self.index.books("fantasy").tolist(), [1, 2])
+        self.assertEqual(self.index.books("Young Adult").tolist(), [1, 3])
+        self.assertEqual(self.index.books("FANTASY", "ya").tolist(), [1])
+        self.assertEqual(self.index.books("westerns").tolist(), [])
+
+    def test_ratings_for_genre(self):
+        self.index.set_rating_counts([3, 1, 9], [7, 5, 11])
+        self.assertEqual(self.index.ratings_for_genre("Fantasy"), 5)
+        self.assertEqual(self.index.ratings_for_genre("young-adult"), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from cache import ConditionalGetMiddleware, DatasetVersion
+
+
+class TestConditionalGet(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.version = DatasetVersion(os.path.join(self.tmp.name, "data", ".dataset_version.json"))
+        self.calls = 0
+        app = FastAPI()
+
+        @app.get("/api/books")
+        def books():
+            self.calls += 1
+            return [1, 2, 3]
+
+        app.add_middleware(ConditionalGetMiddleware, version=self.version)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_validators_before_first_load(self):
+        self.assertEqual(self.version.read(), (0, None))
+        response = self.client.get("/api/books")
+        self.assertNotIn("etag", response.headers)
+
+    def test_not_modified_until_next_load(self):
+        self.assertEqual(self.version.bump(), 1)
+        response = self.client.get("/api/books")
+        etag = response.headers["etag"]
+        self.assertEqual(etag, 'W/"1"')
+        self.assertIn("last-modified", response.headers)
+
+        cached = self.client.get("/api/books", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        since = self.client.get("/api/books", headers={"If-Modified-Since": response.headers["last-modified"]})
+        self.assertEqual(since.status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+        self.version.bump()
+        refreshed = self.client.get("/api/books", headers={"If-None-Match": etag})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(refreshed.headers["etag"], 'W/"2"')
+        self.assertEqual(self.calls, 2)
+
+    def test_lifespan_passes_through(self):
+        started = []
+        self.client.app.router.on_startup.append(lambda: started.append(True))
+        with self.client:
+            self.assertEqual(started, [True])
+            self.assertEqual(self.client.get("/api/books").json(), [1, 2, 3])
+
+    def test_concurrent_bumps_are_not_lost(self):
+        threads = [threading.Thread(target=lambda: [self.version.bump() for _ in range(25)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.version.read()[0], 100)
+        self.assertEqual(DatasetVersion(self.version.path).read()[0], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
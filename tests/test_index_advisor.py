@@ -0,0 +1,116 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from db.index_advisor import IndexAdvisor, IndexSpec, book_column
+
+
+def sqlite_engine(*statements):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    return engine
+
+
+# The users/books/ratings tables test2.py builds, plus its data warehouse.
+API_SCHEMA = [
+    "CREATE TABLE users (user_id INTEGER PRIMARY KEY, user_name TEXT)",
+    "CREATE TABLE ratings (user_id INTEGER, book_id INTEGER, rating REAL)",
+    "CREATE TABLE dim_books (book_id INTEGER PRIMARY KEY, title TEXT, genre TEXT)",
+    "CREATE TABLE fact_ratings (rating_id INTEGER PRIMARY KEY, user_id INT, book_id INT, time_id INT, rating REAL)",
+]
+
+
+class FixedPlanAdvisor(IndexAdvisor):
+    """EXPLAIN is PostgreSQL-only; plans come from a fixed table instead."""
+
+    def __init__(self, engine, plans: dict):
+        super().__init__(engine)
+        self.plans = plans
+
+    def explain(self, shape):
+        return {"node_types": self.plans[shape.endpoint], "execution_ms": 0.1}
+
+
+class TestIndexAdvisor(unittest.TestCase):
+    def test_index_spec_ddl(self):
+        spec = IndexSpec(table="ratings", columns=["book_id"], include=["user_id", "rating"])
+        self.assertEqual(spec.ddl(), "CREATE INDEX IF NOT EXISTS ratings_book_id_idx ON ratings "
+                                     "USING btree (book_id) INCLUDE (user_id, rating)")
+        brin = IndexSpec(table="fact_ratings", columns=["time_id"], method="brin")
+        self.assertEqual(brin.ddl(), "CREATE INDEX IF NOT EXISTS fact_ratings_time_id_brin ON fact_ratings "
+                                     "USING brin (time_id)")
+
+    def test_book_column_follows_schema(self):
+        self.assertEqual(book_column(["user_id", "book_id"]), "book_id")
+        self.assertEqual(book_column(["user_id", "goodreads_book_id"]), "goodreads_book_id")
+
+    def test_recommends_every_lookup_of_an_unindexed_schema(self):
+        specs = IndexAdvisor(sqlite_engine(*API_SCHEMA)).recommend()
+        self.assertEqual([spec.name for spec in specs], [
+            "ratings_book_id_idx", "ratings_user_id_idx", "fact_ratings_book_id_idx",
+            "fact_ratings_time_id_brin", "dim_books_genre_idx",
+        ])
+        self.assertEqual(specs[0].include, ["user_id", "rating"])
+        self.assertEqual(specs[1].include, ["book_id", "rating"])
+
+    def test_schema_sql_tables_use_goodreads_book_id(self):
+        engine = sqlite_engine(
+            "CREATE TABLE ratings (user_id INTEGER, goodreads_book_id INTEGER, rating REAL)",
+            "CREATE TABLE book_tags (goodreads_book_id INTEGER, tag_id INTEGER, count INTEGER)",
+        )
+        specs = IndexAdvisor(engine).recommend()
+        self.assertEqual([spec.name for spec in specs], [
+            "ratings_goodreads_book_id_idx", "ratings_user_id_idx", "book_tags_tag_id_idx",
+        ])
+        self.assertEqual(specs[1].include, ["goodreads_book_id", "rating"])
+
+    def test_existing_indexes_are_not_recommended_again(self):
+        engine = sqlite_engine(
+            *API_SCHEMA,
+            # An index led by the column covers the lookup, whatever its name...
+            "CREATE INDEX ratings_by_user ON ratings (user_id, book_id)",
+            "CREATE INDEX dim_books_genre ON dim_books (genre)",
+            "CREATE INDEX fact_ratings_time ON fact_ratings (time_id)",
+            # ...and an index with the recommended name is taken as already created.
+            "CREATE INDEX ratings_book_id_idx ON ratings (rating)",
+        )
+        specs = IndexAdvisor(engine).recommend()
+        # The BRIN index is still suggested next to the btree one on time_id.
+        self.assertEqual([spec.name for spec in specs], ["fact_ratings_book_id_idx", "fact_ratings_time_id_brin"])
+
+    def test_query_shapes(self):
+        shapes = {shape.endpoint: shape for shape in IndexAdvisor(sqlite_engine(*API_SCHEMA)).query_shapes(7, 42)}
+        self.assertEqual(list(shapes), ["ratings_by_user", "users_who_rated", "top5_books", "ratings_for_genre"])
+        self.assertEqual(shapes["ratings_by_user"].params, {"user_id": 7})
+        self.assertIn("JOIN users u", shapes["users_who_rated"].sql)
+        self.assertFalse(shapes["top5_books"].expect_index)
+
+        # Without a users table users_who_rated reads ratings alone.
+        engine = sqlite_engine("CREATE TABLE ratings (user_id INTEGER, goodreads_book_id INTEGER, rating REAL)")
+        shapes = {shape.endpoint: shape for shape in IndexAdvisor(engine).query_shapes(7, 42)}
+        self.assertEqual(shapes["users_who_rated"].sql,
+                         "SELECT user_id FROM ratings WHERE goodreads_book_id = :book_id")
+        self.assertNotIn("ratings_for_genre", shapes)
+
+    def test_benchmark_flags_sequential_scans(self):
+        plans = {
+            "ratings_by_user": ["Bitmap Heap Scan", "Bitmap Index Scan"],
+            "users_who_rated": ["Hash Join", "Seq Scan", "Hash", "Seq Scan"],
+            "top5_books": ["Limit", "Sort", "HashAggregate", "Seq Scan"],
+            "ratings_for_genre": ["Aggregate", "Nested Loop", "Index Scan", "Index Only Scan"],
+        }
+        report = FixedPlanAdvisor(sqlite_engine(*API_SCHEMA), plans).benchmark(1, 1, repeat=2)
+        self.assertEqual([(row["endpoint"], row["uses_index"], row["ok"]) for row in report], [
+            ("ratings_by_user", True, True),
+            ("users_who_rated", False, False),
+            # Averaging over every book reads the whole table anyway.
+            ("top5_books", False, True),
+            ("ratings_for_genre", True, True),
+        ])
+        self.assertEqual(report[0]["plan"], "Bitmap Heap Scan -> Bitmap Index Scan")
+
+
+if __name__ == '__main__':
+    unittest.main()
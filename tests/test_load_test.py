@@ -0,0 +1,38 @@
+import unittest
+from collections import Counter
+
+import pandas as pd
+
+from benchmarks.load_test import IdSampler, regressions, request_factory, summarize
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_zipf_sampling_favours_popular_ids(self):
+        counts = Counter(IdSampler([7, 3, 9, 1], seed=1).sample(5000))
+        self.assertEqual(set(counts), {7, 3, 9, 1})
+        self.assertEqual(counts.most_common(1)[0][0], 7)
+        self.assertGreater(counts[3], counts[1])
+
+    def test_requests_use_dataset_ids(self):
+        dataset = {"ratings": pd.DataFrame({"user_id": [5, 5, 6], "book_id": [10, 11, 10]}),
+                   "books": pd.DataFrame({"title": ["Dune", "Emma"], "ratings_count": [2, 1]})}
+        next_request = request_factory(["users_who_rated", "ratings_by_user_batch"], dataset)
+        for _ in range(20):
+            name, method, url, body = next_request()
+            if name == "users_who_rated":
+                self.assertIn(url.rsplit("/", 1)[1], {"10", "11"})
+            else:
+                self.assertEqual(method, "POST")
+                self.assertTrue(set(body["ids"]) <= {5, 6})
+
+    def test_summary_and_regressions(self):
+        report = summarize({"top5_books": [(0.010, True)] * 98 + [(0.5, True), (0.2, False)]}, elapsed=2.0)
+        row = report["top5_books"]
+        self.assertEqual((row["requests"], row["rps"], row["p50_ms"], row["error_rate"]), (100, 50.0, 10.0, 0.01))
+        self.assertEqual(regressions(report, report), [])
+        faster = {"top5_books": dict(row, p95_ms=row["p95_ms"] / 2, rps=200.0, error_rate=0.0)}
+        self.assertEqual(len(regressions(report, faster)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
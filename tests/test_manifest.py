@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ingest.manifest import LoadManifest, parse_primary_keys, resolve_key_columns
+
+
+class TestPrimaryKeys(unittest.TestCase):
+    def test_keys_from_schema_map_onto_csv_columns(self):
+        keys = parse_primary_keys()
+        self.assertEqual(keys["books"], ["goodreads_book_id"])
+        self.assertEqual(resolve_key_columns("ratings", ["user_id", "book_id", "rating"], keys),
+                         ["user_id", "book_id"])
+        self.assertEqual(resolve_key_columns("unknown", ["a", "b"], keys), ["a", "b"])
+
+
+class TestLoadManifest(unittest.TestCase):
+    def test_only_new_or_changed_rows_are_returned(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = pd.DataFrame({"user_id": [1, 1, 2], "book_id": [10, 11, 10], "rating": [5, 3, 4]})
+            manifest = LoadManifest(tmp)
+            delta, key_hashes, row_hashes = manifest.delta("ratings", first, ["user_id", "book_id"])
+            self.assertEqual(len(delta), 3)
+            manifest.mark_loaded("ratings", key_hashes, row_hashes)
+            manifest.save("ratings")
+
+            refresh = pd.DataFrame({"user_id": [1, 1, 2, 3], "book_id": [10, 11, 10, 12], "rating": [5, 4, 4, 2]})
+            reloaded = LoadManifest(tmp)
+            delta, key_hashes, row_hashes = reloaded.delta("ratings", refresh, ["user_id", "book_id"])
+            self.assertEqual(delta[["user_id", "book_id"]].values.tolist(), [[1, 11], [3, 12]])
+            reloaded.mark_loaded("ratings", key_hashes, row_hashes)
+            reloaded.save("ratings")
+            self.assertEqual(reloaded.loaded_count("ratings"), 4)
+            self.assertTrue(LoadManifest(tmp).delta("ratings", refresh, ["user_id", "book_id"])[0].empty)
+
+    def test_discarded_rows_are_not_saved(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = LoadManifest(tmp)
+            chunk = pd.DataFrame({"tag_id": [1, 2], "tag_name": ["a", "b"]})
+            _, key_hashes, row_hashes = manifest.delta("tags", chunk, ["tag_id"])
+            manifest.mark_loaded("tags", key_hashes, row_hashes)
+            manifest.discard("tags")
+            manifest.save("tags")
+            self.assertFalse(os.path.exists(os.path.join(tmp, "tags.npz")))
+            self.assertEqual(len(manifest.delta("tags", chunk, ["tag_id"])[0]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from metrics import MetricsRegistry, render_prometheus
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_quantiles(self):
+        histogram = self.registry.histogram("latency_seconds", "latency", ("backend",), buckets=(0.01, 0.1, 1.0))
+        for _ in range(90):
+            histogram.observe(0.005, backend="postgres")
+        for _ in range(10):
+            histogram.observe(0.5, backend="postgres")
+        self.assertEqual(histogram.count(backend="postgres"), 100)
+        self.assertLessEqual(histogram.quantile(0.5, backend="postgres"), 0.01)
+        self.assertGreater(histogram.quantile(0.99, backend="postgres"), 0.1)
+
+    def test_labels_must_match(self):
+        counter = self.registry.counter("errors_total", "errors", ("sink",))
+        with self.assertRaises(ValueError):
+            counter.inc(table="books")
+
+    def test_same_name_returns_same_metric(self):
+        first = self.registry.counter("rows_total", "rows", ("sink",))
+        self.assertIs(first, self.registry.counter("rows_total", "rows", ("sink",)))
+        with self.assertRaises(ValueError):
+            self.registry.histogram("rows_total")
+
+    def test_prometheus_text_format(self):
+        self.registry.counter("rows_total", "Rows written", ("sink",)).inc(5, sink="mongo")
+        self.registry.histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1,)).observe(
+            0.05, endpoint='/a"b')
+        text = render_prometheus(self.registry)
+        self.assertIn("# TYPE rows_total counter", text)
+        self.assertIn('rows_total{sink="mongo"} 5', text)
+        self.assertIn('latency_seconds_bucket{endpoint="/a\\"b",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{endpoint="/a\\"b",le="+Inf"} 1', text)
+        self.assertIn('latency_seconds_count{endpoint="/a\\"b"} 1', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from ingest.mmap_reader import MemoryBudget, MmapCSVReader, byte_ranges
+
+
+class TestMmapCSVReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ratings.csv")
+        with open(self.path, "w") as f:
+            f.write("user_id,book_id\n" + "".join(f"{i},{i * 7}\n" for i in range(1000)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_byte_ranges_cover_every_line_once(self):
+        header, ranges = byte_ranges(self.path, 512)
+        self.assertGreater(len(ranges), 1)
+        with open(self.path, "rb") as f:
+            content = f.read()
+        parts = [pd.read_csv(io.BytesIO(header + content[start:end])) for start, end in ranges]
+        self.assertEqual(pd.concat(parts)["user_id"].tolist(), list(range(1000)))
+
+    def test_ranges_parse_independently_from_the_map(self):
+        with MmapCSVReader(self.path, range_bytes=700) as reader:
+            chunks = [chunk for start, end in reader.ranges() for chunk, _ in reader.chunks(64, start, end)]
+            whole = list(reader.chunks(64))
+        self.assertEqual(pd.concat(chunks)["book_id"].tolist(), [i * 7 for i in range(1000)])
+        self.assertEqual(sum(source_bytes for _, source_bytes in whole), os.path.getsize(self.path))
+
+    def test_close_with_abandoned_generator(self):
+        reader = MmapCSVReader(self.path)
+        chunks = reader.chunks(10)
+        next(chunks)
+        reader.close()
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_acquire_blocks_until_release(self):
+        budget = MemoryBudget(100)
+        budget.acquire(80)
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (budget.acquire(50), acquired.set()))
+        thread.start()
+        time.sleep(0.05)
+        self.assertFalse(acquired.is_set())
+        budget.release(80)
+        thread.join(timeout=1)
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(budget.in_use, 50)
+        # An oversized request still goes through once nothing else is in flight.
+        budget.release(50)
+        budget.acquire(500)
+        self.assertEqual(budget.in_use, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, text
+
+from db.mssql_client import MSSQLClient, parse_column_types, clean_value
+
+
+class TestMSSQLColumnTypes(unittest.TestCase):
+    def test_declared_types_are_read_from_init_script(self):
+        types = parse_column_types()
+        self.assertEqual(types["ratings"], {"user_id": ("INT", 0, 0), "book_id": ("INT", 0, 0),
+                                            "rating": ("DECIMAL", 3, 2)})
+        self.assertEqual(types["books"]["title"], ("NVARCHAR", 255, 0))
+        self.assertNotIn("CONSTRAINT", types["book_tags"])
+
+    def test_nan_becomes_null(self):
+        self.assertIsNone(clean_value(float("nan")))
+        self.assertEqual(clean_value(4.5), 4.5)
+
+
+class TestBcpInsert(unittest.TestCase):
+    def test_single_all_or_nothing_batch(self):
+        client = MSSQLClient(connection_string="mssql+pyodbc://sa:secret@db:1433/goodbooks")
+        client.engine = create_engine("sqlite://")
+        with client.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE ratings (user_id INT, book_id INT, rating INT)"))
+        with mock.patch("db.mssql_client.subprocess.run") as run:
+            client.bcp_insert("ratings", [{"book_id": 10, "user_id": 1, "rating": 5}])
+        command = run.call_args.args[0]
+        self.assertEqual(command[:3], ["bcp", "dbo.ratings", "in"])
+        # Without -b the rows go in as one batch, so a failed run leaves nothing half-loaded.
+        self.assertNotIn("-b", command)
+        self.assertEqual(command[command.index("-m") + 1], "1")
+        self.assertTrue(run.call_args.kwargs["check"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from db.config import DatabaseSettings
+from ingest.multiprocess import MultiprocessLoader, read_batch, release, write_batch
+from metrics import MetricsRegistry
+from metrics.pipeline_metrics import PipelineMetrics
+
+
+class TestSharedBatches(unittest.TestCase):
+    def test_round_trip(self):
+        chunk = pd.DataFrame({"book_id": [1, 2, 3], "rating": [4.5, np.nan, 3.0],
+                              "title": ["Dune", None, "Émile"], "flag": [True, False, True]})
+        batch, shm = write_batch(chunk, "books", "test-1")
+        try:
+            rows = read_batch(batch, shm)
+        finally:
+            shm.close()
+            release(batch.shm_name)
+        self.assertEqual(rows[0], {"book_id": 1, "rating": 4.5, "title": "Dune", "flag": True})
+        self.assertTrue(np.isnan(rows[1]["rating"]))
+        self.assertIsNone(rows[1]["title"])
+        self.assertEqual(rows[2]["title"], "Émile")
+
+
+class TestMultiprocessLoader(unittest.TestCase):
+    def test_loads_file_through_worker_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ratings.csv")
+            with open(path, "w") as f:
+                f.write("user_id,book_id,rating\n" + "".join(f"{i},{i % 50},{i % 5 + 1}\n" for i in range(5000)))
+            db_path = os.path.join(tmp, "sink.db")
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("CREATE TABLE ratings (user_id INT, book_id INT, rating INT)")
+            metrics = PipelineMetrics(MetricsRegistry())
+            settings = DatabaseSettings(postgres_url=f"sqlite:///{db_path}")
+            with MultiprocessLoader(["PostgreSQL"], settings, metrics, parsers=2, chunk_size=500,
+                                    range_bytes=16 * 1024) as loader:
+                loader.load_file(path)
+            self.assertEqual(metrics.rows_written.value(sink="PostgreSQL", table="ratings"), 5000)
+            with sqlite3.connect(db_path) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*), SUM(user_id) FROM ratings").fetchone(),
+                                 (5000, sum(range(5000))))
+
+
+if __name__ == '__main__':
+    unittest.main()
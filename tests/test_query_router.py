@@ -0,0 +1,115 @@
+import unittest
+from typing import ClassVar
+
+from metrics import MetricsRegistry
+from query.base import QueryBackend
+from query.router import QueryRouter, QueryRoutingError
+
+
+class FakeBackend(QueryBackend):
+    name: ClassVar[str] = "fake"
+    label: str
+    fail: bool = False
+
+    def ratings_by_user(self, user_id: int) -> list[dict]:
+        if self.fail:
+            raise RuntimeError("down")
+        return [{"user_id": user_id, "book_id": 1, "rating": 5, "source": self.label}]
+
+    def users_who_rated(self, book_id: int) -> list[dict]:
+        return [{"user_id": 1, "source": self.label}]
+
+    def top_n(self, n: int = 5) -> list[dict]:
+        return [{"book_id": i, "title": f"Book {i}", "avg_rating": 5.0} for i in range(n)]
+
+
+class TestQueryRouter(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_pinned_backend_is_used(self):
+        router = QueryRouter({"postgres": FakeBackend(label="pg"), "mongo": FakeBackend(label="mongo")},
+                             registry=self.registry)
+        name, rows = router.execute("ratings_by_user", 7, backend="mongo")
+        self.assertEqual(name, "mongo")
+        self.assertEqual(rows[0]["source"], "mongo")
+
+    def test_analytic_queries_prefer_clickhouse(self):
+        router = QueryRouter({"postgres": FakeBackend(label="pg"), "clickhouse": FakeBackend(label="ch")},
+                             registry=self.registry)
+        name, rows = router.execute("top_n", 3)
+        self.assertEqual(name, "clickhouse")
+        self.assertEqual(len(rows), 3)
+
+    def test_fastest_backend_wins_after_warm_up(self):
+        router = QueryRouter({"postgres": FakeBackend(label="pg"), "mongo": FakeBackend(label="mongo")},
+                             registry=self.registry, min_samples=2)
+        for elapsed in (0.050, 0.040):
+            router._record("postgres", "users_who_rated", elapsed)
+        for elapsed in (0.002, 0.003):
+            router._record("mongo", "users_who_rated", elapsed)
+        self.assertEqual(router.choose("users_who_rated")[0], "mongo")
+
+    def test_falls_back_when_backend_fails(self):
+        router = QueryRouter({"postgres": FakeBackend(label="pg", fail=True), "mongo": FakeBackend(label="mongo")},
+                             registry=self.registry)
+        name, _ = router.execute("ratings_by_user", 1)
+        self.assertEqual(name, "mongo")
+        self.assertEqual(router.errors.value(backend="postgres", query="ratings_by_user"), 1)
+
+    def test_failing_backend_is_not_tried_first(self):
+        postgres = FakeBackend(label="pg", fail=True)
+        router = QueryRouter({"postgres": postgres, "mongo": FakeBackend(label="mongo")},
+                             registry=self.registry, min_samples=2)
+        for _ in range(10):
+            name, _ = router.execute("ratings_by_user", 1)
+            self.assertEqual(name, "mongo")
+        # Only the first request paid for the failure; the cooldown kept postgres last since.
+        self.assertEqual(router.errors.value(backend="postgres", query="ratings_by_user"), 1)
+        self.assertEqual(router.choose("ratings_by_user"), ["mongo", "postgres"])
+
+        # Once the cooldown is over postgres is sampled again; its failures count as slow samples.
+        router.cooldown = 0
+        self.assertEqual(router.choose("ratings_by_user"), ["postgres", "mongo"])
+        router.execute("ratings_by_user", 1)
+        self.assertEqual(router.choose("ratings_by_user"), ["mongo", "postgres"])
+        self.assertEqual(router._ewma[("postgres", "ratings_by_user")], router.failure_penalty)
+
+    def test_backend_that_cannot_be_built_falls_back(self):
+        def unavailable():
+            raise ModuleNotFoundError("No module named 'clickhouse_driver'")
+
+        router = QueryRouter({"clickhouse": unavailable, "postgres": FakeBackend(label="pg")},
+                             registry=self.registry)
+        name, rows = router.execute("top_n", 2)
+        self.assertEqual(name, "postgres")
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(router.errors.value(backend="clickhouse", query="top_n"), 1)
+        self.assertEqual(router.choose("top_n"), ["postgres", "clickhouse"])
+        with self.assertRaises(QueryRoutingError):
+            router.execute("top_n", 2, backend="clickhouse")
+
+    def test_raises_when_all_backends_fail(self):
+        router = QueryRouter({"postgres": FakeBackend(label="pg", fail=True)}, registry=self.registry)
+        with self.assertRaises(QueryRoutingError):
+            router.execute("ratings_by_user", 1)
+
+    def test_factories_are_built_lazily_and_latency_is_recorded(self):
+        built = []
+
+        def factory():
+            built.append(True)
+            return FakeBackend(label="pg")
+
+        router = QueryRouter({"postgres": factory}, registry=self.registry)
+        self.assertEqual(built, [])
+        router.execute("users_who_rated", 3)
+        router.execute("users_who_rated", 3)
+        self.assertEqual(len(built), 1)
+        summary = router.latency_summary()
+        self.assertEqual(summary[0]["backend"], "postgres")
+        self.assertEqual(summary[0]["count"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
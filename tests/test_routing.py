@@ -0,0 +1,86 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from db.config import DatabaseSettings
+from db.routing import ReplicaSet, ShardMap, distribute_ratings, shard_of
+from metrics import MetricsRegistry
+
+
+class TestReplicaSet(unittest.TestCase):
+    def setUp(self):
+        self.primary, *self.replicas = [create_engine("sqlite://") for _ in range(3)]
+        self.lags = {engine: 0.0 for engine in self.replicas}
+
+    def replica_set(self, **kwargs) -> ReplicaSet:
+        return ReplicaSet(self.primary, self.replicas, lag=self.lags.__getitem__, check_interval=0,
+                          registry=MetricsRegistry(), **kwargs)
+
+    def test_round_robin_skips_stale_replicas(self):
+        replicas = self.replica_set(max_lag=10)
+        self.assertEqual([replicas.read_engine() for _ in range(4)], self.replicas * 2)
+        self.lags[self.replicas[0]] = 60
+        self.assertEqual({replicas.read_engine() for _ in range(4)}, {self.replicas[1]})
+        self.lags[self.replicas[1]] = 60
+        self.assertIs(replicas.read_engine(), self.primary)
+
+    def test_failed_lag_check_falls_back_to_primary(self):
+        def unreachable(engine):
+            raise ConnectionError("down")
+        replicas = ReplicaSet(self.primary, self.replicas, lag=unreachable, registry=MetricsRegistry())
+        self.assertIs(replicas.read_engine(), self.primary)
+
+    def test_least_latency(self):
+        replicas = self.replica_set(strategy="least_latency", min_samples=1)
+        replicas._record(self.replicas[0], 0.5)
+        replicas._record(self.replicas[1], 0.1)
+        self.assertIs(replicas.read_engine(), self.replicas[1])
+        with replicas.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT 1")).scalar(), 1)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            self.replica_set(strategy="random")
+
+
+class TestShardMap(unittest.TestCase):
+    def test_groups_match_engine_for(self):
+        engines = [create_engine("sqlite://") for _ in range(3)]
+        shards = ShardMap(engines)
+        groups = shards.group(range(100))
+        self.assertEqual(sum(map(len, groups.values())), 100)
+        self.assertEqual(len(groups), 3)
+        for shard, user_ids in groups.items():
+            self.assertTrue(all(shards.engine_for(user_id) is engines[shard] for user_id in user_ids))
+        self.assertEqual(shard_of(314, 3), shard_of(314, 3))
+
+    def test_distribute_ratings_places_rows_by_shard_of(self):
+        primary = create_engine("sqlite://")
+        with primary.begin() as conn:
+            conn.execute(text("CREATE TABLE ratings (user_id INTEGER, book_id INTEGER, rating INTEGER)"))
+            conn.execute(text("INSERT INTO ratings VALUES (:user_id, :book_id, 5)"),
+                         [{"user_id": user_id, "book_id": book_id} for user_id in range(20) for book_id in (1, 2)])
+        shards = ShardMap([create_engine("sqlite://") for _ in range(3)])
+        self.assertEqual(sum(distribute_ratings(primary, shards, chunk_size=7)), 40)
+
+        with primary.begin() as conn:
+            conn.execute(text("DELETE FROM ratings WHERE book_id = 2"))
+        counts = distribute_ratings(primary, shards)
+        # A reload replaces the shards' rows rather than adding to them.
+        self.assertEqual(sum(counts), 20)
+        for shard, engine in enumerate(shards.engines):
+            with engine.connect() as conn:
+                user_ids = conn.execute(text("SELECT user_id FROM ratings")).scalars().all()
+            self.assertEqual(len(user_ids), counts[shard])
+            self.assertTrue(all(shard_of(user_id, 3) == shard for user_id in user_ids))
+
+    def test_settings_from_env(self):
+        settings = DatabaseSettings.from_env({"POSTGRES_REPLICA_URLS": "postgresql://a/db, postgresql://b/db",
+                                              "POSTGRES_REPLICA_STRATEGY": "least_latency"})
+        self.assertEqual(settings.postgres_replica_urls, ["postgresql://a/db", "postgresql://b/db"])
+        self.assertEqual(settings.replica_strategy, "least_latency")
+        self.assertEqual(settings.ratings_shard_urls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
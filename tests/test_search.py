@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from search import SearchIndex, build_index, tokenize
+from search.postgres import prefix_tsquery
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        books = pd.DataFrame({
+            "book_id": [1, 2, 3, 4],
+            "title": ["Harry Potter and the Sorcerer's Stone", "The Hobbit", "Les Misérables", "Harriet the Spy"],
+            "original_title": [None, "The Hobbit, or There and Back Again", None, None],
+            "authors": ["J.K. Rowling", "J.R.R. Tolkien", "Victor Hugo", "Louise Fitzhugh"],
+            "ratings_count": [4_600_000, 2_000_000, 600_000, 90_000],
+        })
+        self.tmp = tempfile.TemporaryDirectory()
+        build_index(books, self.tmp.name)
+        self.index = SearchIndex.open(self.tmp.name)
+
+    def tearDown(self):
+        del self.index
+        self.tmp.cleanup()
+
+    def test_tokenize_folds_case_and_accents(self):
+        self.assertEqual(tokenize("Les Misérables"), ["les", "miserables"])
+        self.assertEqual(tokenize(None), [])
+
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual([r["book_id"] for r in self.index.search("har")], [1, 4])
+        self.assertEqual([r["book_id"] for r in self.index.search("MISER")], [3])
+
+    def test_all_words_must_match(self):
+        results = self.index.search("rowling harry")
+        self.assertEqual([r["book_id"] for r in results], [1])
+        self.assertEqual(results[0]["authors"], "J.K. Rowling")
+        # Only the last word may be partial.
+        self.assertEqual(self.index.search("har potter"), [])
+        self.assertEqual([r["book_id"] for r in self.index.search("back hob")], [2])
+
+    def test_ranked_by_ratings_and_limited(self):
+        self.assertEqual([r["book_id"] for r in self.index.search("the", limit=2)], [1, 2])
+
+    def test_completions(self):
+        self.assertEqual(self.index.complete("harry ha"), ["harriet", "harry"])
+        self.assertEqual(self.index.complete(""), [])
+
+    def test_missing_index(self):
+        with tempfile.TemporaryDirectory() as empty:
+            self.assertIsNone(SearchIndex.open(empty))
+
+    def test_rebuild_leaves_open_index_intact(self):
+        # The old build stays mapped and readable while CURRENT moves to a smaller one.
+        first = self.index.directory
+        build_index(pd.DataFrame({"book_id": [9], "title": ["Dune"], "authors": ["Frank Herbert"],
+                                  "ratings_count": [1]}), self.tmp.name)
+        self.assertEqual([r["book_id"] for r in self.index.search("har")], [1, 4])
+        rebuilt = SearchIndex.open(self.tmp.name)
+        self.assertNotEqual(rebuilt.directory, first)
+        self.assertEqual([r["book_id"] for r in rebuilt.search("dune")], [9])
+        # Only the current build and the previous one are kept.
+        build_index(pd.DataFrame({"book_id": [9], "title": ["Dune"]}), self.tmp.name)
+        self.assertEqual(sum(os.path.isdir(os.path.join(self.tmp.name, name))
+                             for name in os.listdir(self.tmp.name)), 2)
+
+    def test_prefix_tsquery(self):
+        self.assertEqual(prefix_tsquery("Harry pot!"), "harry & pot:*")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import MetricsRegistry
+from query import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight(registry=MetricsRegistry())
+        self.release = threading.Event()
+        self.runs = 0
+
+    def slow_query(self):
+        self.runs += 1
+        self.release.wait(5)
+        return ["row"]
+
+    def run_concurrently(self, callers: int, fn, key="book-1"):
+        with ThreadPoolExecutor(callers) as pool:
+            futures = [pool.submit(self.flight.do, "users_who_rated", key, fn) for _ in range(callers)]
+            while self.flight.coalesced.value(query="users_who_rated") < callers - 1:
+                time.sleep(0.01)
+            self.release.set()
+            return futures
+
+    def test_concurrent_calls_share_one_execution(self):
+        futures = self.run_concurrently(8, self.slow_query)
+        results = [future.result() for future in futures]
+        self.assertEqual(self.runs, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.flight.executions.value(query="users_who_rated"), 1)
+        self.assertEqual(self.flight.in_flight(), 0)
+        # Nothing is cached once the call is done.
+        self.flight.do("users_who_rated", "book-1", self.slow_query)
+        self.assertEqual(self.runs, 2)
+
+    def test_errors_reach_every_waiter(self):
+        def failing():
+            self.release.wait(5)
+            raise RuntimeError("connection reset")
+        futures = self.run_concurrently(3, failing)
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result()
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_different_keys_run_separately(self):
+        self.release.set()
+        self.flight.do("users_who_rated", 1, self.slow_query)
+        self.flight.do("users_who_rated", 2, self.slow_query)
+        self.assertEqual(self.runs, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from cache import DatasetVersion
+from warehouse.etl import UNKNOWN_TIME_ID, StarSchemaETL, lookup
+from warehouse.genres import book_genres, normalize_tag
+
+
+class TestGenres(unittest.TestCase):
+    def test_specific_genre_beats_umbrella_shelf(self):
+        self.assertEqual(normalize_tag(" Sci_Fi "), "sci-fi")
+        tags = pd.DataFrame({"tag_id": [1, 2, 3, 4], "tag_name": ["to-read", "fiction", "Fantasy", "non-fiction"]})
+        book_tags = pd.DataFrame({"goodreads_book_id": [10, 10, 10, 20, 20, 30],
+                                  "tag_id": [1, 2, 3, 1, 4, 1], "count": [900, 500, 40, 700, 30, 10]})
+        self.assertEqual(book_genres(book_tags, tags).to_dict(), {10: "Fantasy", 20: "Nonfiction"})
+
+
+class TestStarSchemaETL(unittest.TestCase):
+    def test_lookup(self):
+        result = lookup(np.array([30, 10, 20]), np.array([3, 1, 2]), np.array([20, 40, 10, 30]), -1)
+        self.assertEqual(result.tolist(), [2, -1, 1, 3])
+
+    def test_builds_and_loads_star_schema(self):
+        users = [{"user_id": 1, "user_name": "User1"}, {"user_id": 2, "user_name": "User2"}]
+        books = [{"book_id": 1, "goodreads_book_id": 10, "title": "A", "original_publication_year": 1997.0},
+                 {"book_id": 2, "goodreads_book_id": 20, "title": "B", "original_publication_year": float("nan")}]
+        ratings = [{"user_id": 1, "book_id": 1, "rating": 5}, {"user_id": 2, "book_id": 2, "rating": 3},
+                   {"user_id": 2, "book_id": 1, "rating": 4}, {"user_id": 3, "book_id": 1, "rating": 1}]
+        tags = [{"tag_id": 1, "tag_name": "fantasy"}]
+        book_tags = [{"goodreads_book_id": 10, "tag_id": 1, "count": 5}]
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE dim_users (user_id INT PRIMARY KEY, user_name TEXT)"))
+            conn.execute(text("CREATE TABLE dim_books (book_id INT PRIMARY KEY, title TEXT, genre TEXT)"))
+            conn.execute(text("CREATE TABLE dim_time (time_id INT PRIMARY KEY, date TEXT)"))
+            conn.execute(text("CREATE TABLE fact_ratings (rating_id INTEGER PRIMARY KEY, user_id INT, "
+                              "book_id INT, time_id INT, rating REAL)"))
+        with tempfile.TemporaryDirectory() as tmp:
+            version = DatasetVersion(os.path.join(tmp, ".dataset_version.json"))
+            tables = StarSchemaETL(engine=engine, dataset_version=version).run(users, books, ratings, tags, book_tags)
+            self.assertEqual(version.read()[0], 1)
+        self.assertEqual(tables["dim_books"]["genre"].tolist(), ["Fantasy", "Unknown"])
+        self.assertEqual(tables["dim_time"].values.tolist(), [[UNKNOWN_TIME_ID, None], [19970101, "1997-01-01"]])
+        with engine.connect() as conn:
+            facts = conn.execute(text("SELECT user_id, book_id, time_id FROM fact_ratings ORDER BY rating_id")).fetchall()
+        # The rating by user 3 has no dim_users row and is dropped.
+        self.assertEqual(facts, [(1, 1, 19970101), (2, 2, UNKNOWN_TIME_ID), (2, 1, 19970101)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import io
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from cache import DatasetVersion
+from warehouse.genres import UNKNOWN_GENRE, book_genres
+
+# Rating columns that carry a real event date, in order of preference.
+DATE_COLUMNS = ("rated_at", "date_added", "date", "timestamp")
+
+# Facts whose date is unknown point at this dim_time member (its date is NULL).
+UNKNOWN_TIME_ID = 0
+
+
+def time_ids(dates: pd.Series) -> np.ndarray:
+    """Smart YYYYMMDD keys for datetimes; UNKNOWN_TIME_ID where the date is missing."""
+    keys = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    return keys.fillna(UNKNOWN_TIME_ID).astype(np.int64).to_numpy()
+
+
+def lookup(keys: np.ndarray, values: np.ndarray, wanted: np.ndarray, default) -> np.ndarray:
+    """Vectorised dictionary lookup: values[i] where keys[i] == wanted, default where absent."""
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    positions = np.searchsorted(keys, wanted)
+    positions[positions == len(keys)] = 0
+    found = (keys[positions] == wanted) if len(keys) else np.zeros(len(wanted), dtype=bool)
+    result = np.full(len(wanted), default, dtype=values.dtype)
+    result[found] = values[positions[found]]
+    return result
+
+
+def publication_time_ids(books: pd.DataFrame) -> tuple[np.ndarray, list[tuple[int, Optional[str]]]]:
+    """Time key per book from its original publication year (1 January), plus the dim_time rows used."""
+    column = "original_publication_year" if "original_publication_year" in books else "publication_date"
+    if column not in books:
+        return np.full(len(books), UNKNOWN_TIME_ID, dtype=np.int64), []
+    values = books[column]
+    # Years run from antiquity to today, beyond what datetime64 can hold, so keys are built from integers.
+    years = pd.to_numeric(values, errors="coerce") if column.endswith("year") \
+        else pd.to_datetime(values, errors="coerce", format="mixed").dt.year
+    known = years.notna().to_numpy()
+    year_values = years.to_numpy(dtype=float)
+    keys = np.full(len(books), UNKNOWN_TIME_ID, dtype=np.int64)
+    keys[known] = year_values[known].astype(np.int64) * 10000 + 101
+    return keys, [(int(year) * 10000 + 101, f"{int(year):04d}-01-01") for year in np.unique(year_values[known])]
+
+
+class StarSchemaETL(BaseModel):
+    """Builds the star schema of DataWarehouseSetup from the Goodbooks tables and bulk-loads it.
+
+    Genres come from the books' shelves (book_tags/tags). Dates come from a rating
+    timestamp when the ratings have one, otherwise from the book's publication year.
+    Every key is resolved with vectorised joins, and facts go in with COPY on
+    PostgreSQL, so no step loops over rows in Python. When dataset_version is
+    given it is bumped after each load, so the API's cached responses are revalidated.
+    """
+    engine: object
+    chunk_size: int = 500_000
+    dataset_version: Optional[DatasetVersion] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def build_dim_books(self, books: pd.DataFrame, tags: Optional[pd.DataFrame] = None,
+                        book_tags: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        dim_books = books[["book_id", "title"]].copy()
+        dim_books["genre"] = UNKNOWN_GENRE
+        if tags is not None and book_tags is not None and len(tags) and len(book_tags):
+            key = "goodreads_book_id" if "goodreads_book_id" in book_tags and "goodreads_book_id" in books \
+                else "book_id"
+            genres = book_genres(book_tags, tags, key)
+            dim_books["genre"] = books[key].map(genres).fillna(UNKNOWN_GENRE).to_numpy()
+        return dim_books
+
+    def build_facts(self, ratings: pd.DataFrame, books: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Fact rows with resolved keys, and the dim_time rows they reference."""
+        facts = ratings[["user_id", "book_id", "rating"]].copy()
+        date_column = next((column for column in DATE_COLUMNS if column in ratings), None)
+        if date_column:
+            raw = ratings[date_column]
+            dates = pd.to_datetime(raw, unit="s", errors="coerce") if date_column == "timestamp" \
+                else pd.to_datetime(raw, errors="coerce", format="mixed")
+            facts["time_id"] = time_ids(dates)
+            dim_time = pd.DataFrame({"time_id": facts["time_id"].to_numpy(),
+                                     "date": dates.dt.strftime("%Y-%m-%d").to_numpy()})
+        else:
+            book_keys, used = publication_time_ids(books)
+            facts["time_id"] = lookup(books["book_id"].to_numpy(), book_keys, facts["book_id"].to_numpy(),
+                                      UNKNOWN_TIME_ID)
+            dim_time = pd.DataFrame(used, columns=["time_id", "date"])
+        dim_time = dim_time.dropna().drop_duplicates("time_id")
+        if (facts["time_id"] == UNKNOWN_TIME_ID).any():
+            dim_time = pd.concat([dim_time, pd.DataFrame({"time_id": [UNKNOWN_TIME_ID], "date": [None]})])
+        return facts, dim_time.sort_values("time_id", kind="stable").reset_index(drop=True)
+
+    def build(self, users: pd.DataFrame, books: pd.DataFrame, ratings: pd.DataFrame,
+              tags: Optional[pd.DataFrame] = None, book_tags: Optional[pd.DataFrame] = None) -> dict:
+        """All four tables as DataFrames; facts for unknown books or users are dropped."""
+        dim_books = self.build_dim_books(books, tags, book_tags)
+        dim_users = users[["user_id", "user_name"]].drop_duplicates("user_id")
+        # Hash joins against the dimensions keep only facts whose keys resolve.
+        known = ratings.merge(dim_books[["book_id"]], on="book_id").merge(dim_users[["user_id"]], on="user_id")
+        if len(known) < len(ratings):
+            print(f"Dropped {len(ratings) - len(known)} ratings of books or users missing from the dimensions.")
+        facts, dim_time = self.build_facts(known, books)
+        return {"dim_users": dim_users, "dim_books": dim_books, "dim_time": dim_time, "fact_ratings": facts}
+
+    def copy_frame(self, connection, table_name: str, frame: pd.DataFrame):
+        """COPY a DataFrame into a table on PostgreSQL; a multi-row INSERT elsewhere."""
+        if frame.empty:
+            return
+        columns = list(frame.columns)
+        if connection.dialect.name != "postgresql":
+            placeholders = ", ".join(f":{name}" for name in columns)
+            rows = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+            connection.execute(text(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"), rows)
+            return
+        cursor = connection.connection.cursor()
+        try:
+            for start in range(0, len(frame), self.chunk_size):
+                buffer = io.StringIO()
+                frame.iloc[start:start + self.chunk_size].to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+    def load(self, tables: dict):
+        """Load the built tables in one transaction, dimensions first."""
+        with self.engine.begin() as connection:
+            for table_name in ("dim_users", "dim_books", "dim_time", "fact_ratings"):
+                self.copy_frame(connection, table_name, tables[table_name])
+        if self.dataset_version is not None:
+            self.dataset_version.bump()
+        print("Data Warehouse loaded: " + ", ".join(f"{len(frame)} {name}" for name, frame in tables.items()))
+
+    def run(self, users, books, ratings, tags=None, book_tags=None) -> dict:
+        """Build and load the warehouse from DataFrames or lists of row dicts."""
+        frames = [None if value is None else pd.DataFrame(value) for value in (users, books, ratings, tags, book_tags)]
+        tables = self.build(*frames)
+        self.load(tables)
+        return tables
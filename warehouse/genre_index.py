@@ -0,0 +1,89 @@
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from warehouse.genres import GENRE_TAGS, normalize_tag, tag_genres
+
+
+class GenreIndex:
+    """Inverted index from genre to the sorted book_ids shelved under it.
+
+    Built once from tags.csv and book_tags.csv. A book belongs to every genre it
+    is shelved under by at least `min_share` of the readers of its most-used shelf,
+    so books carry several genres. Genre filters then become sorted-array
+    intersections, and rating counts are gathered from a per-book count array.
+    """
+
+    def __init__(self, postings: dict[str, np.ndarray], rated_books: Optional[np.ndarray] = None,
+                 rating_counts: Optional[np.ndarray] = None):
+        self.postings = postings
+        # Genre names, tag spellings and display names all resolve to the display name.
+        self.aliases = {normalize_tag(genre): genre for genre in postings}
+        self.aliases.update({tag: genre for tag, genre in GENRE_TAGS.items() if genre in postings})
+        self.rated_books = rated_books if rated_books is not None else np.empty(0, dtype=np.int64)
+        self.rating_counts = rating_counts if rating_counts is not None else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, tags: pd.DataFrame, book_tags: pd.DataFrame, books: Optional[pd.DataFrame] = None,
+              min_share: float = 0.05) -> "GenreIndex":
+        """Index book_tags rows. book_tags is keyed by goodreads_book_id, mapped to book_id through books."""
+        key = "goodreads_book_id" if "goodreads_book_id" in book_tags else "book_id"
+        shelves = book_tags[[key, "tag_id"] + (["count"] if "count" in book_tags else [])].copy()
+        if "count" not in shelves:
+            shelves["count"] = 1
+        top = shelves.groupby(key)["count"].transform("max")
+        shelves = shelves[shelves["count"] >= min_share * top]
+        shelves["genre"] = shelves["tag_id"].map(tag_genres(tags))
+        shelves = shelves.dropna(subset=["genre"])
+        if key == "goodreads_book_id" and books is not None:
+            shelves = shelves.merge(books[["goodreads_book_id", "book_id"]], on="goodreads_book_id")
+        else:
+            shelves = shelves.rename(columns={key: "book_id"})
+        postings = {genre: np.unique(group["book_id"].to_numpy(dtype=np.int64))
+                    for genre, group in shelves.groupby("genre")}
+        return cls(postings)
+
+    @classmethod
+    def from_csv(cls, data_dir: str = "data", min_share: float = 0.05) -> Optional["GenreIndex"]:
+        """Build from the Goodbooks CSVs, or None when book_tags.csv has not been downloaded."""
+        paths = {name: os.path.join(data_dir, f"{name}.csv") for name in ("tags", "book_tags", "books")}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        return cls.build(pd.read_csv(paths["tags"]), pd.read_csv(paths["book_tags"]),
+                         pd.read_csv(paths["books"], usecols=["book_id", "goodreads_book_id"]), min_share)
+
+    def set_rating_counts(self, book_ids: Iterable[int], counts: Iterable[int]):
+        """Ratings per book (e.g. from fact_ratings), used by ratings_for_genre."""
+        book_ids = np.asarray(list(book_ids), dtype=np.int64)
+        counts = np.asarray(list(counts), dtype=np.int64)
+        order = np.argsort(book_ids)
+        self.rated_books, self.rating_counts = book_ids[order], counts[order]
+
+    @property
+    def genres(self) -> list[str]:
+        return sorted(self.postings)
+
+    def resolve(self, genre: str) -> Optional[str]:
+        return self.aliases.get(normalize_tag(genre))
+
+    def books(self, *genres: str) -> np.ndarray:
+        """Sorted book_ids shelved under every given genre; unknown genres match nothing."""
+        result = None
+        for genre in genres:
+            name = self.resolve(genre)
+            if name is None:
+                return np.empty(0, dtype=np.int64)
+            postings = self.postings[name]
+            result = postings if result is None else np.intersect1d(result, postings, assume_unique=True)
+        return result if result is not None else np.empty(0, dtype=np.int64)
+
+    def ratings_for_genre(self, *genres: str) -> int:
+        book_ids = self.books(*genres)
+        if not len(self.rated_books) or not len(book_ids):
+            return 0
+        positions = np.searchsorted(self.rated_books, book_ids)
+        positions[positions == len(self.rated_books)] = 0
+        found = self.rated_books[positions] == book_ids
+        return int(self.rating_counts[positions[found]].sum())
@@ -0,0 +1,66 @@
+import re
+
+import pandas as pd
+
+# Goodreads shelf names (normalised) that name a genre, and the genre stored in dim_books.genre.
+GENRE_TAGS = {
+    "fiction": "Fiction",
+    "non-fiction": "Nonfiction", "nonfiction": "Nonfiction",
+    "fantasy": "Fantasy",
+    "science-fiction": "Science Fiction", "sci-fi": "Science Fiction", "scifi": "Science Fiction",
+    "romance": "Romance",
+    "mystery": "Mystery",
+    "crime": "Crime",
+    "thriller": "Thriller",
+    "horror": "Horror",
+    "paranormal": "Paranormal",
+    "historical-fiction": "Historical Fiction",
+    "young-adult": "Young Adult", "ya": "Young Adult",
+    "children": "Children's", "childrens": "Children's",
+    "classics": "Classics", "classic": "Classics",
+    "contemporary": "Contemporary",
+    "chick-lit": "Chick Lit",
+    "dystopian": "Dystopian", "dystopia": "Dystopian",
+    "adventure": "Adventure",
+    "humor": "Humor", "humour": "Humor",
+    "poetry": "Poetry",
+    "comics": "Comics", "graphic-novels": "Comics",
+    "biography": "Biography", "memoir": "Biography", "autobiography": "Biography",
+    "history": "History",
+    "philosophy": "Philosophy",
+    "psychology": "Psychology",
+    "science": "Science",
+    "religion": "Religion",
+    "self-help": "Self Help",
+    "business": "Business",
+    "travel": "Travel",
+}
+
+# Most books carry these umbrella shelves; a more specific genre wins when a book has one.
+BROAD_GENRES = {"Fiction", "Nonfiction"}
+
+UNKNOWN_GENRE = "Unknown"
+
+
+def normalize_tag(name) -> str:
+    """Lower-case a shelf name and join its words with single hyphens ("Sci Fi" -> "sci-fi")."""
+    return re.sub(r"[\s_\-]+", "-", str(name).strip().lower()).strip("-")
+
+
+def tag_genres(tags: pd.DataFrame) -> pd.Series:
+    """Genre per tag_id, for the tags that name one."""
+    names = tags["tag_name"] if "tag_name" in tags else tags["tag"]
+    genres = names.map(normalize_tag).map(GENRE_TAGS)
+    return pd.Series(genres.to_numpy(), index=tags["tag_id"].to_numpy()).dropna()
+
+
+def book_genres(book_tags: pd.DataFrame, tags: pd.DataFrame, key: str = "goodreads_book_id") -> pd.Series:
+    """Each book's genre: its most-shelved specific genre tag, else its most-shelved broad one."""
+    genres = book_tags[[key, "tag_id"] + (["count"] if "count" in book_tags else [])].copy()
+    genres["genre"] = genres["tag_id"].map(tag_genres(tags))
+    genres = genres.dropna(subset=["genre"])
+    if "count" not in genres:
+        genres["count"] = 1
+    genres["specific"] = ~genres["genre"].isin(BROAD_GENRES)
+    genres = genres.sort_values(["specific", "count"], ascending=False, kind="stable")
+    return genres.drop_duplicates(key).set_index(key)["genre"]